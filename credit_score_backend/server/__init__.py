@@ -4,13 +4,24 @@ import logging
 
 # Import các route từ controllers
 from server.controllers.application_controller import get_client_app_info, get_clients_app_info
-from controllers.bureau_controller import get_client_bureau_info, get_clients_bureau_info
-from controllers.bureau_balance_controller import get_client_bureau_balance_info, get_clients_bureau_balance_info
-from controllers.card_controller import get_client_card_info, get_clients_card_info
-from controllers.cash_controller import get_client_cash_info, get_clients_cash_info
+from server.controllers.bureau_controller import get_client_bureau_info, get_clients_bureau_info
+from server.controllers.bureau_balance_controller import get_client_bureau_balance_info, get_clients_bureau_balance_info, get_bureau_loan_balance_info
+from server.controllers.card_controller import get_client_card_info, get_clients_card_info
+from server.controllers.cash_controller import get_client_cash_info, get_clients_cash_info
 from server.controllers.credit_scores_controller import get_client_credit_score, get_clients_credit_score
-from controllers.installments_controller import get_client_installment_info, get_clients_installment_info
-from controllers.previous_application_controller import get_client_previous_app_info, get_clients_previous_app_info
+from server.controllers.installments_controller import get_client_installment_info, get_clients_installment_info
+from server.controllers.previous_application_controller import get_client_previous_app_info, get_clients_previous_app_info
+from server.controllers.batch_controller import get_clients_batch_info
+from server.controllers.bundle_controller import get_client_bundle
+from server.controllers.similar_clients_controller import get_similar_clients
+from server.controllers.comparison_controller import get_client_comparison
+from server.controllers.score_controller import get_client_score, score_applicant, get_scoring_stats
+from server.controllers.cache_controller import get_cache_stats
+from server.controllers.metrics_controller import get_metrics
+from server.controllers.profiling_controller import get_profiles, get_profile
+from server.controllers.admin_controller import reload_tables
+from server.controllers.health_controller import get_liveness, get_readiness, table_not_ready
+from server.controllers import METRICS, PROFILER, TableNotReady
 
 # Cấu hình logging
 logging.basicConfig(level=logging.DEBUG)
@@ -26,6 +37,7 @@ def create_app():
     app.add_url_rule('/clients_bureau', 'get_clients_bureau_info', get_clients_bureau_info)
     app.add_url_rule('/client_bureau_balance/<int:client_id>', 'get_client_bureau_balance_info', get_client_bureau_balance_info)
     app.add_url_rule('/clients_bureau_balance', 'get_clients_bureau_balance_info', get_clients_bureau_balance_info)
+    app.add_url_rule('/bureau_balance/<int:bureau_id>', 'get_bureau_loan_balance_info', get_bureau_loan_balance_info)
     app.add_url_rule('/client_card/<int:client_id>', 'get_client_card_info', get_client_card_info)
     app.add_url_rule('/clients_card', 'get_clients_card_info', get_clients_card_info)
     app.add_url_rule('/client_cash/<int:client_id>', 'get_client_cash_info', get_client_cash_info)
@@ -36,6 +48,26 @@ def create_app():
     app.add_url_rule('/clients_installment', 'get_clients_installment_info', get_clients_installment_info)
     app.add_url_rule('/client_previous_app/<int:client_id>', 'get_client_previous_app_info', get_client_previous_app_info)
     app.add_url_rule('/clients_previous_app', 'get_clients_previous_app_info', get_clients_previous_app_info)
+    app.add_url_rule('/client_bundle/<int:client_id>', 'get_client_bundle', get_client_bundle)
+    app.add_url_rule('/similar_clients/<int:client_id>', 'get_similar_clients', get_similar_clients)
+    app.add_url_rule('/comparison/<int:client_id>', 'get_client_comparison', get_client_comparison)
+    app.add_url_rule('/clients_batch/<table_name>', 'get_clients_batch_info', get_clients_batch_info, methods=['POST'])
+    app.add_url_rule('/score/<int:client_id>', 'get_client_score', get_client_score)
+    app.add_url_rule('/score', 'score_applicant', score_applicant, methods=['POST'])
+    app.add_url_rule('/scoring_stats', 'get_scoring_stats', get_scoring_stats)
+    app.add_url_rule('/cache_stats', 'get_cache_stats', get_cache_stats)
+    app.add_url_rule('/metrics', 'get_metrics', get_metrics)
+    app.add_url_rule('/profiles', 'get_profiles', get_profiles)
+    app.add_url_rule('/profiles/<name>', 'get_profile', get_profile)
+    app.add_url_rule('/healthz', 'get_liveness', get_liveness)
+    app.add_url_rule('/readyz', 'get_readiness', get_readiness)
+    app.add_url_rule('/admin/reload', 'reload_tables', reload_tables, methods=['POST'])
+
+    app.register_error_handler(TableNotReady, table_not_ready)
+
+    METRICS.init_app(app)
+    if PROFILER is not None:
+        PROFILER.init_app(app)
     
     return app
 
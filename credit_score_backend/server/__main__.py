@@ -1,7 +1,78 @@
+import gc
+import multiprocessing
+import os
+
+from werkzeug.serving import is_running_from_reloader
 
 from server import init_app
+from server.controllers import METRICS, start_background_tasks
+
+
+def run_production(app, bind, workers, threads, asgi=False):
+    '''
+        Serve the app with pre-forked gunicorn workers, or with
+        pre-forked uvicorn workers if the app is the ASGI app.
+
+        Unless loaded in the background, the tables are loaded by this
+        process before it forks, so that the workers share their memory
+        (copy-on-write) instead of each loading its own copy.
+    '''
+    from gunicorn.app.base import BaseApplication
+
+    options = {
+        'bind': bind,
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread' if threads > 1 else 'sync',
+        'preload_app': True,
+        # Background loading and reloading run in each worker,
+        # as the threads of this process would not survive the fork
+        'post_fork': lambda server, worker: start_background_tasks(),
+        # The workers publish their metrics to a directory
+        # made once for this server, and removed when it stops
+        'on_starting': lambda server: METRICS.make_shared_dir(),
+        'on_exit': lambda server: METRICS.remove_shared_dir(),
+    }
+    if asgi:
+        # The ASGI app starts them itself, on the startup of each worker
+        options['worker_class'] = 'uvicorn_worker.UvicornWorker'
+        del options['post_fork']
+
+    class Server(BaseApplication):
+
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    # Keep the garbage collector of the workers away from the objects
+    # loaded so far, as touching them would copy their memory pages
+    gc.freeze()
+
+    Server().run()
+
 
 if __name__ == '__main__':
     app = init_app
-    app.run(host='0.0.0.0', port=5000, debug=True)
 
+    server_mode = os.getenv('SERVER_MODE', 'development')
+
+    if server_mode == 'asgi':
+        from server.asgi import application
+        run_production(application,
+                       bind=os.getenv('BIND', '0.0.0.0:5000'),
+                       workers=int(os.getenv('WORKERS', multiprocessing.cpu_count())),
+                       threads=int(os.getenv('THREADS', 4)),
+                       asgi=True)
+    elif server_mode == 'production':
+        run_production(app,
+                       bind=os.getenv('BIND', '0.0.0.0:5000'),
+                       workers=int(os.getenv('WORKERS', multiprocessing.cpu_count())),
+                       threads=int(os.getenv('THREADS', 4)))
+    else:
+        # The reloader's parent process only watches the files
+        if is_running_from_reloader():
+            start_background_tasks()
+        app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,184 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import io
+import os
+import sys
+
+from server import init_app
+from server.controllers import start_background_tasks
+
+
+# Routes streaming whole tables or many clients at once
+BULK_PATH_PREFIXES = ('/clients_',)
+
+
+class AsyncApp:
+    '''
+        ASGI application serving a WSGI app from an event loop.
+
+        The WSGI app runs, and its response body is produced chunk by chunk,
+        in a bounded pool of threads, so that slicing, serialization and
+        compression never block the event loop. The bulk routes get a pool
+        of their own, so that long exports never hold the threads serving
+        cheap lookups. A chunk is only produced once the previous one was
+        sent, and production stops as soon as the client disconnects.
+
+        The pools start their threads on the first request, so that
+        the app can be created before the server forks its workers.
+    '''
+
+    def __init__(self, wsgi_app, threads=4, bulk_threads=1,
+                 bulk_prefixes=BULK_PATH_PREFIXES, on_startup=None):
+        self.wsgi_app = wsgi_app
+        self.bulk_prefixes = bulk_prefixes
+        self.on_startup = on_startup
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='asgi')
+        self._bulk_executor = ThreadPoolExecutor(max_workers=bulk_threads, thread_name_prefix='asgi-bulk')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if self.on_startup is not None:
+                    self.on_startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._bulk_executor.shutdown(wait=False, cancel_futures=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        # Request bodies (client ID lists, applicants to score) are small
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            if not message.get('more_body', False):
+                break
+
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            await self._respond(scope, bytes(body), send, disconnected)
+        finally:
+            watcher.cancel()
+
+    async def _respond(self, scope, body, send, disconnected):
+        loop = asyncio.get_running_loop()
+        bulk = scope['path'].startswith(self.bulk_prefixes)
+        executor = self._bulk_executor if bulk else self._executor
+
+        environ = wsgi_environ(scope, body)
+        response_start = []
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None and response_start and response_start[0] is None:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response_start[:] = [{
+                'type': 'http.response.start',
+                'status': int(status[:3]),
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                            for name, value in headers],
+            }]
+
+        def next_chunk(chunks):
+            # Skip the empty chunks, None marking the end of the body
+            for chunk in chunks:
+                if chunk:
+                    return chunk
+            return None
+
+        result = await loop.run_in_executor(executor, self.wsgi_app, environ, start_response)
+        try:
+            chunks = await loop.run_in_executor(executor, iter, result)
+            # The WSGI app may only start the response with the first chunk
+            chunk = await loop.run_in_executor(executor, next_chunk, chunks)
+
+            await send(response_start[0])
+            # The start is sent, later start_response calls must raise
+            response_start[0] = None
+            if scope['method'] == 'HEAD':
+                chunk = None
+
+            while chunk is not None and not disconnected.is_set():
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await loop.run_in_executor(executor, next_chunk, chunks)
+
+            if not disconnected.is_set():
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            if hasattr(result, 'close'):
+                await loop.run_in_executor(executor, result.close)
+
+
+def wsgi_environ(scope, body):
+    '''
+        Build the WSGI environ of an ASGI HTTP request
+    '''
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]) if server[1] is not None else '80',
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        # The body is read whole, also when it was sent chunked
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+
+    client = scope.get('client')
+    if client:
+        environ['REMOTE_ADDR'] = client[0]
+        environ['REMOTE_PORT'] = str(client[1])
+
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = name
+        else:
+            key = f'HTTP_{name}'
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+
+    # The length of the body as read, chunked bodies having none
+    environ['CONTENT_LENGTH'] = str(len(body))
+    environ.pop('HTTP_TRANSFER_ENCODING', None)
+
+    return environ
+
+
+application = AsyncApp(init_app,
+                       threads=int(os.getenv('THREADS', 4)),
+                       bulk_threads=int(os.getenv('BULK_THREADS', 1)),
+                       on_startup=start_background_tasks)
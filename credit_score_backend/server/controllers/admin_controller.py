@@ -0,0 +1,33 @@
+import hmac
+
+from flask import abort, jsonify, request
+
+from server.controllers import TABLES, RELOAD_REQUESTS, admin_token, parse_table_list
+
+
+def reload_tables():  # noqa: E501
+    """Reload tables from their .csv files
+
+    Reloads the loaded tables listed in the tables query parameter (every table by default)
+    in the background, in every worker, swapping in the ones whose data changed # noqa: E501
+
+    :rtype: TableReload
+    """
+    if not admin_token:
+        abort(403, "Admin routes are disabled, set ADMIN_TOKEN to enable them")
+
+    authorization = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {admin_token}".encode()):
+        abort(401, "Missing or invalid admin token")
+
+    try:
+        names = parse_table_list(request.args.get("tables", "all"))
+    except ValueError as e:
+        abort(400, str(e))
+
+    names = [name for name in names if TABLES.is_loaded(name)]
+    RELOAD_REQUESTS.request(names)
+
+    response = jsonify({"reloading": names})
+    response.status_code = 202
+    return response
@@ -2,10 +2,13 @@
 
 from flask import Flask, abort, jsonify
 
-from server.controllers import SAVED_APP_DATA
+from server.controllers import TABLES
+from server.controllers.responses import bulk_response, cached_client_response, conditional, frame_response, requested_columns
 
 
 
+@conditional(["app"])
+@cached_client_response("app")
 def get_client_app_info(client_id):  # noqa: E501
     """Get a client's banking information by ID
 
@@ -19,12 +22,14 @@ def get_client_app_info(client_id):  # noqa: E501
     if not isinstance(client_id, int):
         abort(400, "Supplied ID is not an integer")
 
-    if client_id not in SAVED_APP_DATA["SK_ID_CURR"].values:
+    client_index = TABLES["app"].index
+
+    if client_id not in client_index:
         abort(404, "Client not found")
 
-    client_data = SAVED_APP_DATA[SAVED_APP_DATA["SK_ID_CURR"] == client_id].to_json(orient="records")
-    return jsonify(client_data)
+    return frame_response(client_index.rows(client_id, columns=requested_columns("app")))
 
+@conditional(["app"])
 def get_clients_app_info():  # noqa: E501
     """Get all clients' banking information
 
@@ -32,6 +37,4 @@ def get_clients_app_info():  # noqa: E501
 
     :rtype: MultipleApplicationInformation
     """
-    return SAVED_APP_DATA.to_json(orient="records")
-
-print(get_clients_app_info)
\ No newline at end of file
+    return bulk_response("app")
@@ -0,0 +1,86 @@
+import json
+
+from flask import Response, abort, request
+
+from server.controllers import TABLES, client_index, max_batch_size
+from server.controllers.formats import DOCUMENT_FORMATS, JSON, MSGPACK, frame_records, pack_msgpack
+from server.controllers.metrics import timed
+from server.controllers.responses import negotiate, requested_columns
+
+
+# Client IDs a table can hold, the others are never found
+MIN_CLIENT_ID = -2**63
+MAX_CLIENT_ID = 2**63 - 1
+
+
+def parse_client_ids(payload):
+    '''
+        Read the list of client IDs of a batch request, given either
+        as a JSON list or as the "client_ids" field of a JSON object
+    '''
+    if isinstance(payload, dict):
+        payload = payload.get("client_ids")
+
+    if not isinstance(payload, list):
+        abort(400, "Supplied body is not a list of client IDs")
+
+    if any(isinstance(client_id, bool) or not isinstance(client_id, int) for client_id in payload):
+        abort(400, "Supplied IDs are not all integers")
+
+    if len(payload) > max_batch_size:
+        abort(400, f"Supplied more than {max_batch_size} IDs")
+
+    # Drop duplicates, keeping the order of the request
+    return list(dict.fromkeys(payload))
+
+
+def get_clients_batch_info(table_name):  # noqa: E501
+    """Get several clients' information from a table by ID
+
+    Returns the rows of each requested client, grouped by client, along with the IDs of the clients not found.
+    The fields query parameter restricts the columns returned # noqa: E501
+
+    :param table_name: Name of the table
+    :type table_name: str
+
+    :rtype: MultipleClientsInformation
+    """
+    if table_name not in TABLES:
+        abort(404, "Table not found")
+
+    client_ids = parse_client_ids(request.get_json(silent=True))
+
+    table = TABLES[table_name]
+    columns = requested_columns(table_name)
+    found_ids, counts, positions, _ = client_index(table_name).lookup(
+        [client_id for client_id in client_ids if MIN_CLIENT_ID <= client_id <= MAX_CLIENT_ID])
+
+    # The found clients are in the order of the request, and so are the others
+    found = set(found_ids.tolist())
+    not_found = [client_id for client_id in client_ids if client_id not in found]
+
+    with timed("slicing"):
+        rows = table.frame.iloc[positions]
+        if columns is not None:
+            rows = rows[columns]
+
+    with timed("serialization"):
+        if negotiate(DOCUMENT_FORMATS) == MSGPACK:
+            records = frame_records(rows)
+            clients = {}
+            start = 0
+            for client_id, count in zip(found_ids.tolist(), counts.tolist()):
+                clients[str(client_id)] = records[start:start + count]
+                start += count
+            return Response(pack_msgpack({"clients": clients, "not_found": not_found}), mimetype=MSGPACK)
+
+        # Serialize all the rows at once, one record per line, and
+        # assemble the document around the records of each client
+        records = rows.to_json(orient="records", lines=True).rstrip('\n').split('\n') if len(rows) else []
+        parts = []
+        start = 0
+        for client_id, count in zip(found_ids.tolist(), counts.tolist()):
+            parts.append('"%d":[%s]' % (client_id, ','.join(records[start:start + count])))
+            start += count
+        body = '{"clients":{%s},"not_found":%s}' % (','.join(parts), json.dumps(not_found, separators=(',', ':')))
+    return Response(body, mimetype=JSON)
@@ -0,0 +1,132 @@
+from concurrent.futures import Future
+import queue
+import threading
+import time
+
+import numpy as np
+
+
+class MicroBatcher:
+    '''
+        Collects concurrent scoring requests into micro-batches.
+
+        Each request waits for a batch of at most max_batch_size rows,
+        closed max_wait seconds after its first row arrived, which is
+        scored with a single call to predict. The worker thread starts
+        on the first request, so that forked processes start their own.
+    '''
+
+    def __init__(self, predict, max_batch_size=64, max_wait=0.002):
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self.batches = 0
+        self.rows = 0
+        self.max_queue_depth = 0
+        # batch size upper bound -> number of batches
+        self.batch_size_buckets = dict.fromkeys(self._bucket_bounds(max_batch_size), 0)
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bucket_bounds(max_batch_size):
+        bounds = []
+        bound = 1
+        while bound < max_batch_size:
+            bounds.append(bound)
+            bound *= 2
+        bounds.append(max_batch_size)
+        return bounds
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name="scoring-batcher", daemon=True)
+                    self._worker.start()
+
+    def submit(self, features):
+        '''
+            Score a single feature vector, waiting for its batch
+        '''
+        self._ensure_worker()
+
+        future = Future()
+        self._queue.put((features, future))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+
+        return future.result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            futures = [future for _, future in batch]
+
+            try:
+                probabilities = self.predict(np.vstack([features for features, _ in batch]))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for future, probability in zip(futures, probabilities):
+                    future.set_result(float(probability))
+
+            self._record(len(batch))
+
+    def _record(self, batch_size):
+        self.batches += 1
+        self.rows += batch_size
+        for bound in self.batch_size_buckets:
+            if batch_size <= bound:
+                self.batch_size_buckets[bound] += 1
+                break
+
+    def counts(self):
+        '''
+            Return the counters of the batches, with the number of batches
+            of each size bucket (see batch_size_buckets), along with the
+            current queue depth
+        '''
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "batch_sizes": list(self.batch_size_buckets.values()),
+            "queue_depth": self._queue.qsize(),
+        }
+
+    def stats(self):
+        # Number of batches of at most each size, as in Prometheus histograms
+        histogram = {}
+        cumulative = 0
+        for bound, count in self.batch_size_buckets.items():
+            cumulative += count
+            histogram[f"le_{bound}"] = cumulative
+
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0,
+            "batch_size_histogram": histogram,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
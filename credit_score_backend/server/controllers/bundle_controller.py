@@ -0,0 +1,57 @@
+from flask import Response, abort, request
+
+from server.controllers import TABLE_FILES, client_index, parse_table_list
+from server.controllers.formats import DOCUMENT_FORMATS, JSON, MSGPACK, frame_records, pack_msgpack
+from server.controllers.metrics import timed
+from server.controllers.responses import conditional, negotiate
+
+
+def requested_tables(client_id=None):
+    '''
+        Read the tables of a bundle from the tables query parameter,
+        every table by default
+    '''
+    try:
+        table_names = parse_table_list(request.args.get("tables", "all"))
+    except ValueError as e:
+        abort(400, str(e))
+
+    return table_names or list(TABLE_FILES)
+
+
+@conditional(requested_tables)
+def get_client_bundle(client_id):  # noqa: E501
+    """Get all of a client's information by ID
+
+    Returns a single client's information from every table, or from the tables listed in the tables query parameter # noqa: E501
+
+    :param client_id: ID of client
+    :type client_id: int
+
+    :rtype: ClientBundle
+    """
+    if not isinstance(client_id, int):
+        abort(400, "Supplied ID is not an integer")
+
+    table_names = requested_tables()
+
+    slices = {}
+    found = False
+    for table_name in table_names:
+        index = client_index(table_name)
+        found = found or client_id in index
+        slices[table_name] = index.rows(client_id)
+
+    if not found:
+        abort(404, "Client not found")
+
+    with timed("serialization"):
+        if negotiate(DOCUMENT_FORMATS) == MSGPACK:
+            bundle = {"SK_ID_CURR": client_id}
+            bundle.update({name: frame_records(rows) for name, rows in slices.items()})
+            return Response(pack_msgpack(bundle), mimetype=MSGPACK)
+
+        # Serialize each table's slice once and assemble the document around them
+        parts = [f'"{name}":' + rows.to_json(orient="records") for name, rows in slices.items()]
+        body = '{"SK_ID_CURR":%d,%s}' % (client_id, ','.join(parts))
+    return Response(body, mimetype=JSON)
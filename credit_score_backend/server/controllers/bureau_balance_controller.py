@@ -1,9 +1,12 @@
 
 from flask import Flask, abort, jsonify
 
-from server.controllers import SAVED_BUREAU_BALANCE_DATA
+from server.controllers import TABLES, client_index
+from server.controllers.responses import bulk_response, cached_client_response, conditional, frame_response, requested_columns
 
 
+@conditional(["bureau_balance"])
+@cached_client_response("bureau_balance")
 def get_client_bureau_balance_info(client_id):  # noqa: E501
     """Get a client's bureau balance information by ID
 
@@ -17,12 +20,36 @@ def get_client_bureau_balance_info(client_id):  # noqa: E501
     if not isinstance(client_id, int):
         abort(400, "Supplied ID is not an integer")
 
-    if client_id not in SAVED_BUREAU_BALANCE_DATA["SK_ID_CURR"].values:
+    # bureau_balance is keyed by bureau loan, and joined to clients through bureau
+    index = client_index("bureau_balance")
+
+    if client_id not in index:
         abort(404, "Client not found")
 
-    client_data = SAVED_BUREAU_BALANCE_DATA[SAVED_BUREAU_BALANCE_DATA["SK_ID_CURR"] == client_id].to_json(orient="records")
-    return jsonify(client_data)
+    return frame_response(index.rows(client_id, columns=requested_columns("bureau_balance")))
+
+@conditional(["bureau_balance"])
+def get_bureau_loan_balance_info(bureau_id):  # noqa: E501
+    """Get a bureau loan's balance information by ID
+
+    Returns the monthly balances of a single bureau loan # noqa: E501
+
+    :param bureau_id: ID of bureau loan
+    :type bureau_id: int
+
+    :rtype: BureauBalanceInformation
+    """
+    if not isinstance(bureau_id, int):
+        abort(400, "Supplied ID is not an integer")
+
+    loan_index = TABLES["bureau_balance"].index
+
+    if bureau_id not in loan_index:
+        abort(404, "Bureau loan not found")
+
+    return frame_response(loan_index.rows(bureau_id, columns=requested_columns("bureau_balance")))
 
+@conditional(["bureau_balance"])
 def get_clients_bureau_balance_info():  # noqa: E501
     """Get all clients' bureau balance information
 
@@ -30,4 +57,4 @@ def get_clients_bureau_balance_info():  # noqa: E501
 
     :rtype: MultipleBureauBalanceInformation
     """
-    return SAVED_BUREAU_BALANCE_DATA.to_json(orient="records")
\ No newline at end of file
+    return bulk_response("bureau_balance")
\ No newline at end of file
@@ -1,7 +1,10 @@
 from flask import Flask, abort, jsonify
-from server.controllers import SAVED_BUREAU_DATA
+from server.controllers import TABLES
+from server.controllers.responses import bulk_response, cached_client_response, conditional, frame_response, requested_columns
 
 
+@conditional(["bureau"])
+@cached_client_response("bureau")
 def get_client_bureau_info(client_id):  # noqa: E501
     """Get a client's bureau information by ID
 
@@ -15,13 +18,15 @@ def get_client_bureau_info(client_id):  # noqa: E501
     if not isinstance(client_id, int):
         abort(400, "Supplied ID is not an integer")
 
-    if client_id not in SAVED_BUREAU_DATA["SK_ID_CURR"].values:
+    client_index = TABLES["bureau"].index
+
+    if client_id not in client_index:
         abort(404, "Client not found")
 
-    client_data = SAVED_BUREAU_DATA[SAVED_BUREAU_DATA["SK_ID_CURR"] == client_id].to_json(orient="records")
-    return jsonify(client_data)
+    return frame_response(client_index.rows(client_id, columns=requested_columns("bureau")))
 
 
+@conditional(["bureau"])
 def get_clients_bureau_info():  # noqa: E501
     """Get all clients' bureau information
 
@@ -29,4 +34,4 @@ def get_clients_bureau_info():  # noqa: E501
 
     :rtype: MultipleBureauInformation
     """
-    return SAVED_BUREAU_DATA.to_json(orient="records")
\ No newline at end of file
+    return bulk_response("bureau")
\ No newline at end of file
@@ -0,0 +1,16 @@
+from server.controllers import RESPONSE_CACHE, BULK_CACHE
+from server.controllers.responses import document_response
+
+
+def get_cache_stats():  # noqa: E501
+    """Get the statistics of the response caches
+
+    Returns the size, hit, miss and eviction counters of the per-client response cache
+    and of the compressed bulk response cache # noqa: E501
+
+    :rtype: CacheStatistics
+    """
+    return document_response({
+        "client_responses": RESPONSE_CACHE.stats(),
+        "bulk_responses": BULK_CACHE.stats(),
+    })
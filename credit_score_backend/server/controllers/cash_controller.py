@@ -1,8 +1,11 @@
 
 from flask import Flask, abort, jsonify
-from server.controllers import SAVED_CASH_DATA
+from server.controllers import TABLES
+from server.controllers.responses import bulk_response, cached_client_response, conditional, frame_response, requested_columns
 
 
+@conditional(["cash"])
+@cached_client_response("cash")
 def get_client_cash_info(client_id):  # noqa: E501
     """Get a client's cash information by ID
 
@@ -16,13 +19,15 @@ def get_client_cash_info(client_id):  # noqa: E501
     if not isinstance(client_id, int):
         abort(400, "Supplied ID is not an integer")
 
-    if client_id not in SAVED_CASH_DATA["SK_ID_CURR"].values:
+    client_index = TABLES["cash"].index
+
+    if client_id not in client_index:
         abort(404, "Client not found")
 
-    client_data = SAVED_CASH_DATA[SAVED_CASH_DATA["SK_ID_CURR"] == client_id].to_json(orient="records")
-    return jsonify(client_data)
+    return frame_response(client_index.rows(client_id, columns=requested_columns("cash")))
 
 
+@conditional(["cash"])
 def get_clients_cash_info():  # noqa: E501
     """Get all clients' cash information
 
@@ -30,4 +35,4 @@ def get_clients_cash_info():  # noqa: E501
 
     :rtype: MultipleCashInformation
     """
-    return SAVED_CASH_DATA.to_json(orient="records")
\ No newline at end of file
+    return bulk_response("cash")
\ No newline at end of file
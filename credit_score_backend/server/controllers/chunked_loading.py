@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from server.controllers.memory import current_rss
+
+
+class ColumnBuffers:
+    '''
+        Accumulates the columns of a table chunk by chunk.
+
+        Numpy columns are preallocated for capacity rows (an upper bound
+        of the number of rows, when known) and filled in place, so that
+        memory peaks at about the size of the table plus a chunk. The
+        other columns (categories, strings) are copied out of each chunk
+        and concatenated once every chunk is appended.
+    '''
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity
+        self._columns = []
+        self._arrays = {}
+        self._parts = {}
+        self.rows = 0
+
+    def append(self, chunk):
+        start, stop = self.rows, self.rows + len(chunk)
+        if not self._columns:
+            self._columns = list(chunk.columns)
+
+        for c in chunk:
+            values = chunk[c].array
+            if not isinstance(values, pd.arrays.NumpyExtensionArray):
+                self._parts.setdefault(c, []).append(values)
+                continue
+
+            values = values.to_numpy()
+            array = self._arrays.get(c)
+            if array is None or stop > len(array):
+                # Grow the column when the capacity is unknown or too small
+                size = max(self.capacity or 0, 2 * stop)
+                grown = np.empty(size, dtype=values.dtype)
+                if array is not None:
+                    grown[:start] = array[:start]
+                array = self._arrays[c] = grown
+            array[start:stop] = values
+
+        self.rows = stop
+
+    def frame(self):
+        columns = {}
+        for c in self._columns:
+            if c in self._arrays:
+                array = self._arrays.pop(c)
+                columns[c] = array if len(array) == self.rows else array[:self.rows].copy()
+                del array
+                continue
+
+            parts = self._parts.pop(c)
+            if isinstance(parts[0], pd.Categorical):
+                # Sorted categories, as astype('category') gives them
+                columns[c] = union_categoricals(parts, sort_categories=True)
+            else:
+                columns[c] = pd.concat([pd.Series(part, copy=False) for part in parts], ignore_index=True).array
+            del parts
+
+        # Without copy, each column stays in its own block
+        return pd.DataFrame(columns, copy=False)
+
+
+def count_lines(file_path, block_size=1 << 24):
+    '''
+        Count the lines of a file, an upper bound of the rows of a .csv file
+    '''
+    lines = 0
+    last = b'\n'
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    return lines + (last != b'\n')
+
+def read_chunks(chunks, name, memory_limit=None, capacity=None):
+    '''
+        Assemble a df from an iterable of df chunks, at most capacity rows
+        if known, failing with a MemoryError as soon as the resident memory
+        of the process exceeds memory_limit (in bytes) rather than when it
+        runs out
+    '''
+    buffers = ColumnBuffers(capacity)
+    for chunk in chunks:
+        buffers.append(chunk)
+        del chunk
+
+        if memory_limit:
+            rss = current_rss()
+            if rss is not None and rss > memory_limit:
+                raise MemoryError(f"Loading {name} exceeded the memory limit "
+                                  f"({rss / 2**20:.0f} MB > {memory_limit / 2**20:.0f} MB) "
+                                  f"after {buffers.rows} rows")
+
+    return buffers.frame()
@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+
+from server.controllers.metrics import timed
+
+
+# Keys the rows of a client are ordered by, after the client ID
+SECONDARY_KEYS = ["SK_ID_PREV", "SK_ID_BUREAU"]
+
+
+def concat_ranges(starts, counts):
+    '''
+        Return the positions of the ranges starts[k]:starts[k] + counts[k],
+        concatenated in order
+    '''
+    ends = np.cumsum(counts)
+    return np.arange(ends[-1] if len(ends) else 0) + np.repeat(starts - (ends - counts), counts)
+
+
+def cluster_by_client(frame, key="SK_ID_CURR"):
+    '''
+        Sort the rows of a df by client ID (or another key), then by the SECONDARY_KEYS
+        it has, keeping the order of the file between equal keys, so
+        that the rows of each client are contiguous.
+
+        The sorted df is built column by column, so that the columns
+        of the original df are freed as they go if nothing else holds
+        them. Already sorted dfs are returned as they are.
+    '''
+    if key not in frame.columns:
+        return frame
+
+    keys = [frame[k].to_numpy() for k in [key] + [k for k in SECONDARY_KEYS if k != key and k in frame.columns]]
+    # lexsort is stable, and sorts by its last key first
+    order = np.lexsort(keys[::-1])
+    if np.array_equal(order, np.arange(len(order))):
+        return frame
+    del keys
+
+    columns = {}
+    for c in list(frame.columns):
+        columns[c] = frame.pop(c).take(order).array
+    return pd.DataFrame(columns, copy=False)
+
+
+class ClientIndex:
+    '''
+        Per-client row index over a table clustered by client
+        (see cluster_by_client). Tables clustered by another key,
+        such as bureau_balance by bureau loan, are indexed by that key.
+
+        The rows of the client client_ids[i] are the contiguous range
+        offsets[i]:offsets[i + 1] of the table, so that a client's rows
+        are a slice of the table found by binary search, rather than
+        rows gathered from all over it.
+    '''
+
+    def __init__(self, frame, key="SK_ID_CURR"):
+        self.frame = frame
+        self.key = key
+
+        if key not in frame.columns:
+            # Tables keyed by another ID than the client's (bureau_balance)
+            # are indexed by that ID, and joined to clients (see JoinIndex)
+            raise ValueError(f"Table has no {key} column to be indexed by")
+
+        keys = frame[key].to_numpy()
+        if len(keys) and np.any(keys[1:] < keys[:-1]):
+            raise ValueError(f"Table is not sorted by {key}")
+
+        starts = np.flatnonzero(np.diff(keys, prepend=keys[:1] - 1)) if len(keys) else np.empty(0, dtype=np.intp)
+
+        # Sorted array of the indexed client IDs, and the row
+        # ranges of each of them, built once at load time
+        self.client_ids = keys[starts].astype(np.int64)
+        self.offsets = np.append(starts, len(keys)).astype(np.intp)
+
+    def __contains__(self, client_id):
+        return self._find(client_id) is not None
+
+    def __len__(self):
+        return len(self.client_ids)
+
+    def _find(self, client_id):
+        i = np.searchsorted(self.client_ids, client_id)
+        if i < len(self.client_ids) and self.client_ids[i] == client_id:
+            return i
+        return None
+
+    def range(self, client_id):
+        '''
+            Return the slice of row positions of a client,
+            empty if the client is unknown
+        '''
+        i = self._find(client_id)
+        if i is None:
+            return slice(0, 0)
+        return slice(self.offsets[i], self.offsets[i + 1])
+
+    def positions(self, client_id):
+        '''
+            Return the row positions of a client,
+            or an empty array if the client is unknown
+        '''
+        rows = self.range(client_id)
+        return np.arange(rows.start, rows.stop)
+
+    def rows(self, client_id, columns=None):
+        '''
+            Return the slice of the table belonging to a client,
+            restricted to the given columns if any. Without columns,
+            the slice is a view of the table rather than a copy.
+        '''
+        with timed("lookup"):
+            rows = self.range(client_id)
+        with timed("slicing"):
+            if columns is None:
+                return self.frame.iloc[rows]
+            return self.frame.iloc[rows, self.frame.columns.get_indexer(columns)]
+
+    def page(self, after=None, limit=None):
+        '''
+            Return the client IDs following the client ID after,
+            at most limit of them, along with the slice of their rows
+        '''
+        with timed("lookup"):
+            ids = self.client_ids
+            start = 0 if after is None else int(np.searchsorted(ids, after, side='right'))
+            stop = len(ids) if limit is None else min(start + limit, len(ids))
+            return ids[start:stop], slice(self.offsets[start], self.offsets[max(start, stop)])
+
+    def lookup(self, client_ids):
+        '''
+            Resolve many client IDs in a single pass.
+
+            Returns the known client IDs, the number of rows of each,
+            their row positions concatenated in the same order,
+            and the unknown client IDs
+        '''
+        with timed("lookup"):
+            client_ids = np.asarray(client_ids, dtype=np.int64)
+            i = np.searchsorted(self.client_ids, client_ids)
+            known = i < len(self.client_ids)
+            known[known] = self.client_ids[i[known]] == client_ids[known]
+            i = i[known]
+
+            starts = self.offsets[i]
+            counts = self.offsets[i + 1] - starts
+            return client_ids[known], counts, concat_ranges(starts, counts), client_ids[~known]
+
+
+class JoinIndex(ClientIndex):
+    '''
+        Per-client row index over a table keyed by another ID than the
+        client's, linked to clients through a second table holding both
+        IDs: bureau_balance is keyed by SK_ID_BUREAU, and the bureau
+        table tells the SK_ID_CURR of each SK_ID_BUREAU.
+
+        Built once from the index of the linking table (client -> range
+        of links) and the index of the table by its own key (key -> range
+        of rows), as the row range of each link. The rows of a client are
+        then the ranges of its links, one after the other, found without
+        merging the tables or storing the client ID of every row.
+
+        Only clients with rows are indexed. Row positions are returned
+        as arrays rather than slices.
+    '''
+
+    def __init__(self, link_index, key_index, key):
+        self.frame = key_index.frame
+        self.key = key
+
+        # Row range of each link, in the order of the linking table
+        link_keys = link_index.frame[key].to_numpy()
+        # (the first and last key positions only differ for known keys)
+        first = np.searchsorted(key_index.client_ids, link_keys, side='left')
+        last = np.searchsorted(key_index.client_ids, link_keys, side='right')
+        self.row_starts = key_index.offsets[first]
+        self.row_counts = key_index.offsets[last] - self.row_starts
+
+        # Range of links, and number of rows, of each client
+        link_starts = link_index.offsets[:-1]
+        link_stops = link_index.offsets[1:]
+        rows_before = np.concatenate(([0], np.cumsum(self.row_counts)))
+        counts = rows_before[link_stops] - rows_before[link_starts]
+
+        has_rows = counts > 0
+        self.client_ids = link_index.client_ids[has_rows]
+        self.link_starts = link_starts[has_rows]
+        self.link_stops = link_stops[has_rows]
+        self.counts = counts[has_rows]
+
+    def range(self, client_id):
+        '''
+            Return the row positions of a client,
+            empty if the client is unknown
+        '''
+        i = self._find(client_id)
+        if i is None:
+            return np.empty(0, dtype=np.intp)
+        return self._rows_of_links(self.link_starts[i], self.link_stops[i])
+
+    def positions(self, client_id):
+        return self.range(client_id)
+
+    def _rows_of_links(self, start, stop):
+        return concat_ranges(self.row_starts[start:stop], self.row_counts[start:stop])
+
+    def page(self, after=None, limit=None):
+        with timed("lookup"):
+            ids = self.client_ids
+            start = 0 if after is None else int(np.searchsorted(ids, after, side='right'))
+            stop = len(ids) if limit is None else min(start + limit, len(ids))
+            if stop <= start:
+                return ids[start:start], np.empty(0, dtype=np.intp)
+            # Links of the clients without rows in between add no rows
+            return ids[start:stop], self._rows_of_links(self.link_starts[start], self.link_stops[stop - 1])
+
+    def lookup(self, client_ids):
+        with timed("lookup"):
+            client_ids = np.asarray(client_ids, dtype=np.int64)
+            i = np.searchsorted(self.client_ids, client_ids)
+            known = i < len(self.client_ids)
+            known[known] = self.client_ids[i[known]] == client_ids[known]
+            i = i[known]
+
+            links = concat_ranges(self.link_starts[i], self.link_stops[i] - self.link_starts[i])
+            positions = concat_ranges(self.row_starts[links], self.row_counts[links])
+            return client_ids[known], self.counts[i], positions, client_ids[~known]
@@ -0,0 +1,78 @@
+import numpy as np
+
+from server.controllers.config import COMPARISON_FEATURES, COMPARISON_DAYS_COLUMNS, COMPARISON_SCORE_MARGIN
+
+
+COMPARISON_FEATURE_NAMES = [feature for features in COMPARISON_FEATURES.values() for feature in features]
+
+
+def feature_matrix(frame):
+    '''
+        Compute the comparison features of every row of an application df,
+        as a (rows, features) array, durations converted from days to years
+    '''
+    columns = []
+    for feature in COMPARISON_FEATURE_NAMES:
+        if feature in COMPARISON_DAYS_COLUMNS:
+            columns.append(frame[COMPARISON_DAYS_COLUMNS[feature]].to_numpy(dtype=np.float64) / 365 * (-1))
+        else:
+            columns.append(frame[feature].to_numpy(dtype=np.float64))
+    return np.column_stack(columns)
+
+def cohort_aggregates(scores, features, best_margin=0):
+    '''
+        Average the features of the best, of all and of the worst clients
+        of a population, given their credit scores and feature rows.
+
+        The best clients score at most COMPARISON_SCORE_MARGIN (plus
+        best_margin) above the lowest score, the worst clients at least
+        COMPARISON_SCORE_MARGIN below the highest one, as in the dashboard.
+    '''
+    if len(scores) == 0:
+        return {"count": 0, "best": None, "average": None, "worst": None}
+
+    best_threshold = int(scores.min()) + COMPARISON_SCORE_MARGIN + best_margin
+    worst_threshold = int(scores.max()) - COMPARISON_SCORE_MARGIN
+
+    def means(mask):
+        # Missing values are skipped, as by pandas' mean
+        values = features[mask]
+        missing = np.isnan(values)
+        sums = np.where(missing, 0, values).sum(axis=0)
+        counts = (~missing).sum(axis=0)
+        return {feature: None if count == 0 else float(total / count)
+                for feature, total, count in zip(COMPARISON_FEATURE_NAMES, sums, counts)}
+
+    return {
+        "count": int(len(scores)),
+        "best": means(scores <= best_threshold),
+        "average": means(slice(None)),
+        "worst": means(scores >= worst_threshold),
+    }
+
+
+class ComparisonData:
+    '''
+        The comparison features and credit score of every row of the
+        application table (NaN scores for the clients without one),
+        along with the aggregates of the whole population of scored
+        clients, computed once per version of the data.
+    '''
+
+    def __init__(self, app_table, score_table):
+        # First credit score of each client, aligned with the application rows
+        score_frame = score_table.frame.drop_duplicates("SK_ID_CURR")
+        self.scores = (score_frame.set_index("SK_ID_CURR")["Credit Score"]
+                       .reindex(app_table.frame["SK_ID_CURR"]).to_numpy(dtype=np.float64))
+        scored = ~np.isnan(self.scores)
+
+        self.features = feature_matrix(app_table.frame)
+        self.global_aggregates = cohort_aggregates(self.scores[scored], self.features[scored])
+
+    def aggregates(self, positions, best_margin=0):
+        '''
+            Aggregate the scored clients among the given application rows
+        '''
+        scores = self.scores[positions]
+        scored = ~np.isnan(scores)
+        return cohort_aggregates(scores[scored], self.features[positions][scored], best_margin)
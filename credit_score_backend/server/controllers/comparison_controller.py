@@ -0,0 +1,54 @@
+import numpy as np
+from flask import abort
+
+from server.controllers import TABLES, COMPARISON_FEATURES
+from server.controllers.comparison import COMPARISON_FEATURE_NAMES, ComparisonData, feature_matrix
+from server.controllers.responses import conditional, document_response
+from server.controllers.similar_clients_controller import find_similar_clients, parse_similarity_args
+
+
+def comparison_data():
+    '''
+        Return the comparison data of the current versions
+        of the application and credit score tables
+    '''
+    score_table = TABLES["credit_score"]
+    return TABLES["app"].derived(("comparison", score_table.version),
+                                 lambda app_table: ComparisonData(app_table, score_table))
+
+def client_features(client_id):
+    rows = TABLES["app"].index.rows(client_id)
+    values = feature_matrix(rows)[0]
+    return {feature: None if np.isnan(value) else float(value)
+            for feature, value in zip(COMPARISON_FEATURE_NAMES, values)}
+
+
+@conditional(["app", "credit_score"])
+def get_client_comparison(client_id):  # noqa: E501
+    """Compare a client with the best, average and worst clients by ID
+
+    Returns the client's most important features along with their mean over the best, all
+    and the worst clients, among the clients similar to the client (see /similar_clients,
+    whose criteria and tolerance query parameters apply) and among every client # noqa: E501
+
+    :param client_id: ID of client
+    :type client_id: int
+
+    :rtype: ClientComparison
+    """
+    if not isinstance(client_id, int):
+        abort(400, "Supplied ID is not an integer")
+
+    criteria, tolerance, _ = parse_similarity_args()
+    _, _, positions = find_similar_clients(client_id, criteria, tolerance)
+
+    data = comparison_data()
+
+    return document_response({
+        "SK_ID_CURR": client_id,
+        "features": COMPARISON_FEATURES,
+        "client": client_features(client_id),
+        # The dashboard's best similar clients score one point more than its best clients
+        "similar": data.aggregates(positions, best_margin=1),
+        "global": data.global_aggregates,
+    })
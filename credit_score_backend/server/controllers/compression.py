@@ -0,0 +1,55 @@
+import zlib
+
+
+def available_encodings():
+    '''
+        Content encodings the responses can be compressed with,
+        by order of preference
+    '''
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return ["gzip"]
+    return ["zstd", "gzip"]
+
+def compressor(encoding, level):
+    '''
+        Return an object compressing a stream of bytes with the given
+        encoding, through its compress() and flush() methods
+    '''
+    if encoding == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=level).compressobj()
+
+    # wbits=31 writes the gzip header and trailer around the deflate stream
+    return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+def compress_stream(chunks, encoding, level, on_complete=None, max_size=None):
+    '''
+        Compress a stream of str or bytes chunks on the fly.
+
+        Once the stream is exhausted, on_complete is called with the
+        whole compressed payload, unless it got larger than max_size.
+    '''
+    stream = compressor(encoding, level)
+    parts = [] if on_complete is not None else None
+    size = 0
+
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+
+        data = stream.compress(chunk)
+        if data:
+            size += len(data)
+            if parts is not None:
+                parts.append(data)
+                if max_size is not None and size > max_size:
+                    parts = None
+            yield data
+
+    data = stream.flush()
+    if parts is not None:
+        parts.append(data)
+        on_complete(b''.join(parts))
+    yield data
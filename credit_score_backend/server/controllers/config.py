@@ -1,7 +1,22 @@
 import numpy as np
 import pandas as pd
 from joblib import load
+from datetime import datetime, timezone
+from functools import partial
+import hashlib
+import json
 import os
+import tempfile
+
+from server.controllers.batching import MicroBatcher
+from server.controllers.chunked_loading import count_lines, read_chunks
+from server.controllers.client_index import JoinIndex, cluster_by_client
+from server.controllers.metrics import RequestMetrics
+from server.controllers.profiling import RequestProfiler
+from server.controllers.reloading import DatasetWatcher, ReloadRequests
+from server.controllers.response_cache import ResponseCache
+from server.controllers.scoring import ScoringModel
+from server.controllers.tables import Table, TableNotReady, TableRegistry
 
 
 #---------------------- Functions ----------------------#
@@ -40,45 +55,579 @@ def convert_types(df, print_info = False):
         
     return df
 
-def load_csv_file(file_path):
+def infer_schema(df):
+    '''
+        Infer the dtypes convert_types gives the columns of a df as parsed
+        by read_csv, along with the dtypes read_csv should parse them as
+        to get there directly (None to keep its own inference)
+    '''
+    has_nulls = df.isna().any()
+    converted = convert_types(df.copy())
+
+    schema = {}
+    for c in converted:
+        dtype = str(converted[c].dtype)
+        if 'SK_ID' in c and has_nulls[c]:
+            # Missing IDs are filled with 0 once parsed
+            parse = 'float64'
+        elif dtype in ('int32', 'float32', 'bool', 'category'):
+            parse = dtype
+        elif not pd.api.types.is_numeric_dtype(converted[c].dtype):
+            # Text, also in the chunks without any
+            parse = dtype
+        else:
+            parse = None
+        schema[c] = {'parse': parse, 'dtype': dtype}
+    return schema
+
+def apply_schema(df, schema):
+    '''
+        Finish converting a df parsed with the dtypes of a schema inferred
+        from a sample of its file, correcting the conversions that depend
+        on the whole column rather than on the sample
+    '''
+    for c, entry in schema.items():
+        column = df[c]
+
+        if 'SK_ID' in c:
+            if column.dtype != np.int32:
+                df[c] = column.fillna(0).astype(np.int32)
+
+        # Booleans are the columns whose values are 1 then 0
+        elif entry['dtype'] == 'bool':
+            if list(column.unique()) != [True, False]:
+                df[c] = column.astype(np.int32)
+        elif entry['dtype'] == 'int32' and len(column) and column.min() >= 0 and column.max() <= 1:
+            if list(column.unique()) == [1, 0]:
+                df[c] = column.astype(bool)
+
+        # Categories are the object columns with repeated values
+        elif entry['dtype'] == 'category':
+            if len(column.cat.categories) >= len(column):
+                df[c] = column.astype(object)
+        elif column.dtype == 'object' and column.nunique() < len(column):
+            df[c] = column.astype('category')
+
+    return df
+
+def widen_dtype(dtype, other):
+    '''
+        Return the dtype read_csv gives a column whose rows it parses as
+        dtype in some chunks of a file, and as other in the others
+    '''
+    if dtype is None or dtype == other:
+        return other
+
+    def is_number(d):
+        return pd.api.types.is_numeric_dtype(d) and not pd.api.types.is_bool_dtype(d)
+
+    if is_number(dtype) and is_number(other):
+        return np.dtype('float64')
+    # Text, or values of several kinds, read as text
+    for d in (dtype, other):
+        if not is_number(d) and not pd.api.types.is_bool_dtype(d):
+            return d
+    return np.dtype('object')
+
+def infer_file_schema(file_path, columns):
+    '''
+        Infer the schema of a .csv file from all its rows, parsed
+        load_chunk_rows at a time, so that the file never is in memory
+        as a whole: the dtypes read_csv gives the columns of the whole
+        file are the ones it gives the chunks, widened to fit them all
+    '''
+    dtypes = dict.fromkeys(columns)
+    has_nulls = dict.fromkeys(columns, False)
+    with pd.read_csv(file_path, usecols=columns, chunksize=load_chunk_rows) as reader:
+        for chunk in reader:
+            for c in columns:
+                dtypes[c] = widen_dtype(dtypes[c], chunk[c].dtype)
+                has_nulls[c] = has_nulls[c] or bool(chunk[c].isna().any())
+
+    schema = {}
+    for c in columns:
+        dtype = dtypes[c]
+        if pd.api.types.is_bool_dtype(dtype):
+            parse = 'bool'
+        elif pd.api.types.is_integer_dtype(dtype):
+            parse = 'int32'
+        elif pd.api.types.is_float_dtype(dtype):
+            parse = 'float32'
+        else:
+            # Parsed as text, whatever each chunk looks like
+            parse = str(dtype)
+
+        if 'SK_ID' in c:
+            # Missing IDs are filled with 0 once parsed
+            schema[c] = {'parse': 'float64' if has_nulls[c] or parse == 'float32' else parse, 'dtype': 'int32'}
+        else:
+            schema[c] = {'parse': parse, 'dtype': parse}
+    return schema
+
+def schema_path(file_path, digest):
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(cache_dir, f"{stem}.{digest[:16]}.schema.json")
+
+def read_schema(file_path, digest, columns):
+    '''
+        Read the schema saved for a version of a .csv file (identified by
+        its hash digest), None if there is none or if it was inferred for
+        other columns
+    '''
+    try:
+        with open(schema_path(file_path, digest)) as f:
+            schema = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return schema if list(schema) == columns else None
+
+def write_schema(file_path, digest, schema):
+    '''
+        Save the schema of a version of a .csv file, replacing
+        the schemas saved for its older versions
+    '''
+    path = schema_path(file_path, digest)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # A temporary file of its own, as other workers may save it too
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=os.path.basename(path) + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(schema, f, indent=1)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        for f in os.listdir(cache_dir):
+            if f != os.path.basename(path) and f.startswith(stem + '.') and f.endswith('.schema.json'):
+                os.remove(os.path.join(cache_dir, f))
+    except OSError as e:
+        print(f"Could not save the schema of {file_path}: {e}")
+
+def read_csv_file(file_path, chunked=False, digest=None):
+    '''
+        Parse a .csv file from the specified file path
+        and transforms it into a pandas df, dropping its first column.
+
+        The columns are parsed straight into the dtypes convert_types
+        would give them, according to a schema inferred from the first
+        schema_sample_rows rows of the file and saved along with the
+        cached tables, keyed by the hash of the file (computed unless
+        given as digest). Each new version of the file gets its own.
+        Files whose later rows do not fit the schema of the first ones
+        get their schema inferred again from all their rows, chunk by
+        chunk, and are parsed again.
+
+        When chunked, the file is parsed load_chunk_rows rows at a time
+        (see read_chunks), so that memory peaks at about the size of the
+        compacted table rather than at the size of the parser's output.
+    '''
+    columns = list(pd.read_csv(file_path, nrows=0).columns[1:])
+
+    digest = digest or file_hash(file_path)
+    schema = read_schema(file_path, digest, columns)
+    if schema is None:
+        sample = pd.read_csv(file_path, nrows=schema_sample_rows, usecols=columns)
+        schema = infer_schema(sample)
+        write_schema(file_path, digest, schema)
+
+    try:
+        df = parse_csv_file(file_path, columns, schema, chunked)
+    except (ValueError, TypeError, OverflowError) as e:
+        print(f"Schema of {file_path} does not fit ({e}), inferring it from all its rows...")
+        schema = infer_file_schema(file_path, columns)
+        write_schema(file_path, digest, schema)
+        try:
+            df = parse_csv_file(file_path, columns, schema, chunked)
+        except (ValueError, TypeError, OverflowError) as e:
+            print(f"Schema of {file_path} still does not fit ({e}), converting it as a whole...")
+            return convert_types(pd.read_csv(file_path, usecols=columns))
+
+    return apply_schema(df, schema)
+
+def parse_csv_file(file_path, columns, schema, chunked=False):
+    '''
+        Parse the columns of a .csv file with the dtypes of a schema
+    '''
+    dtypes = {c: entry['parse'] for c, entry in schema.items() if entry['parse'] is not None}
+    if chunked:
+        with pd.read_csv(file_path, usecols=columns, dtype=dtypes, chunksize=load_chunk_rows) as reader:
+            return read_chunks(reader, file_path, load_memory_limit, capacity=count_lines(file_path) - 1)
+    return pd.read_csv(file_path, usecols=columns, dtype=dtypes)
+
+def file_hash(file_path, chunk_size=1 << 20):
+    '''
+        Hash the content of a file, used to key its cached copy
+    '''
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def write_cache_file(df, cache_path):
+    '''
+        Write a type-compacted df to a parquet file, replacing the
+        cached copies of older versions of the same source file
+    '''
+    cache_name = os.path.basename(cache_path)
+    stem = cache_name.split('.')[0]
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+
+    # Write to a temporary file of its own first, so that a crash never
+    # leaves a truncated cache behind, and that workers writing the
+    # same cache at once never write to the same file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), prefix=cache_name + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            df.to_parquet(f)
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    for f in os.listdir(os.path.dirname(cache_path)):
+        if f != cache_name and f.startswith(stem + '.') and f.endswith('.parquet'):
+            os.remove(os.path.join(os.path.dirname(cache_path), f))
+
+def load_csv_file(file_path, digest=None, chunked=False, key="SK_ID_CURR"):
     '''
         Load a .csv file from the specified file path
-        and transforms it into a pandas df
+        and transforms it into a pandas df.
+
+        The transformed df is clustered by client (or by key), and cached as parquet,
+        keyed by the hash of the .csv file (computed unless given as digest),
+        so that later loads skip parsing, type conversion and sorting until
+        the .csv file changes. When chunked, both are read chunk by chunk.
     '''
-    df = pd.read_csv(file_path)
-    df = df.drop(df.columns[0], axis=1)  # Drop the first column if necessary
-    return convert_types(df)
+    if not use_data_cache:
+        return cluster_by_client(read_csv_file(file_path, chunked, digest), key)
+
+    digest = digest or file_hash(file_path)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    cache_path = os.path.join(cache_dir, f"{stem}.{digest[:16]}.{key}.parquet")
+
+    if os.path.exists(cache_path):
+        if chunked:
+            import pyarrow.parquet as pq
+
+            parquet_file = pq.ParquetFile(cache_path, memory_map=True)
+            batches = parquet_file.iter_batches(batch_size=load_chunk_rows)
+            return read_chunks((batch.to_pandas() for batch in batches), cache_path, load_memory_limit,
+                               capacity=parquet_file.metadata.num_rows)
+        return pd.read_parquet(cache_path, memory_map=True)
+
+    df = cluster_by_client(read_csv_file(file_path, chunked, digest), key)
+
+    try:
+        write_cache_file(df, cache_path)
+    except (OSError, ImportError) as e:
+        print(f"Could not cache {file_path}: {e}")
+
+    return df
 
 #---------------------- Variables ----------------------#
 
 
 data_dir = os.getenv('DATA_DIR', '/app/data')
 
+# Load the tables in the background once the server listens, rather
+# than before, and the number of seconds clients should retry after.
+# Only the development server does so by default: the production and
+# asgi modes load the tables before forking their workers, so that
+# the workers share their memory instead of each loading its own copy.
+server_mode = os.getenv('SERVER_MODE', 'development')
+background_loading = os.getenv('BACKGROUND_LOADING', '1' if server_mode == 'development' else '0') != '0'
+retry_after = int(os.getenv('RETRY_AFTER', 5))
+
+# Seconds between two checks of the .csv files for new versions
+# of the data, 0 to only reload them through /admin/reload
+reload_interval = float(os.getenv('RELOAD_INTERVAL', 0))
+# Token to send as "Authorization: Bearer <token>" to /admin/reload,
+# which is disabled when it is not set
+admin_token = os.getenv('ADMIN_TOKEN')
+
+# Parquet copies of the loaded tables, rebuilt when a .csv file changes
+cache_dir = os.getenv('CACHE_DIR', os.path.join(data_dir, '.cache'))
+use_data_cache = os.getenv('DATA_CACHE', '1') != '0'
+
+# Rows of a .csv file its column types are inferred from
+schema_sample_rows = int(os.getenv('SCHEMA_SAMPLE_ROWS', 100000))
+
+# The tables listed in CHUNKED_TABLES are loaded this many rows at a time,
+# their loading failing once the process uses more than LOAD_MEMORY_LIMIT_MB
+load_chunk_rows = int(os.getenv('LOAD_CHUNK_ROWS', 500000))
+load_memory_limit = int(float(os.getenv('LOAD_MEMORY_LIMIT_MB', 0)) * 2**20)
+
+# Bulk routes serialize this many rows at a time, and serve at most
+# max_page_size clients per page when paginated
+stream_chunk_rows = int(os.getenv('STREAM_CHUNK_ROWS', 10000))
+max_page_size = int(os.getenv('MAX_PAGE_SIZE', 10000))
+
+# Trained LightGBM model used by the scoring routes
+model_path = os.getenv('MODEL_PATH', os.path.join(data_dir, 'lgbm_trained_model_whole_dataset.joblib'))
+preload_model = os.getenv('PRELOAD_MODEL', '0') == '1'
+
+# Concurrent scoring requests are scored together, in batches of at most
+# scoring_batch_size rows collected for at most scoring_batch_wait_ms
+use_scoring_batches = os.getenv('SCORING_BATCHES', '1') != '0'
+scoring_batch_size = int(os.getenv('SCORING_BATCH_SIZE', 64))
+scoring_batch_wait_ms = float(os.getenv('SCORING_BATCH_WAIT_MS', 2))
+
+# Maximum number of client IDs in a batch lookup
+max_batch_size = int(os.getenv('MAX_BATCH_SIZE', 1000))
+
+# Serialized per-client responses kept in memory, in megabytes
+response_cache_mb = float(os.getenv('RESPONSE_CACHE_MB', 64))
+
+# Compression of the bulk routes, whose compressed payloads
+# are kept in memory (in megabytes) for each version of the data
+compression_levels = {
+    'gzip': int(os.getenv('GZIP_LEVEL', 6)),
+    'zstd': int(os.getenv('ZSTD_LEVEL', 3)),
+}
+bulk_cache_mb = float(os.getenv('BULK_CACHE_MB', 256))
+
+# Requests profiled when profiling is enabled: those sent with the
+# X-Profile header, and a random share profile_sample_rate of the others
+use_profiling = os.getenv('PROFILING', '0') == '1'
+profile_dir = os.getenv('PROFILE_DIR', os.path.join(cache_dir, 'profiles'))
+profile_sample_rate = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+profile_max_files = int(os.getenv('PROFILE_MAX_FILES', 100))
+
+# Directory where each worker process publishes its metrics, for /metrics
+# to sum them. Unless METRICS_DIR is set, the production and asgi servers
+# make a temporary one for their workers (see run_production).
+metrics_dir = os.getenv('METRICS_DIR')
+
 
 
 
 #-------------------------------------------------------#
 
-# Loading the original data that has been transformed and used to train
-# the model on.
+# The original data that has been transformed and used to train
+# the model on. Each table is loaded the first time a route needs it,
+# except for the ones listed in PRELOAD_TABLES ("all" by default,
+# "none" to load every table on demand).
 
-print("Loading training data into dataframes...")
+TABLE_FILES = {
+    "app": "application_test.csv",
+    "bureau": "bureau.csv",
+    "bureau_balance": "bureau_balance.csv",
+    "cash": "POS_CASH_balance.csv",
+    "card": "credit_card_balance.csv",
+    "installments": "installments_payments.csv",
+    "previous_app": "previous_application.csv",
+    "credit_score": "predictions_test.csv",
+}
+
+# Tables keyed by another ID than the client's, with the table linking
+# that ID to clients: the rows of bureau_balance belong to bureau loans
+# (SK_ID_BUREAU), and the bureau table tells the client of each loan.
+
+CLIENT_JOINS = {
+    "bureau_balance": ("bureau", "SK_ID_BUREAU"),
+}
+
+# Named column projections, by table, usable in the fields
+# query parameter of the data routes
+
+DASHBOARD_APP_COLUMNS = [
+    'SK_ID_CURR',
+    # Personal information and similar clients criteria
+    'AMT_INCOME_TOTAL', 'CNT_CHILDREN', 'CNT_FAM_MEMBERS', 'CODE_GENDER',
+    'DAYS_BIRTH', 'DAYS_EMPLOYED', 'NAME_CONTRACT_TYPE', 'NAME_EDUCATION_TYPE',
+    'NAME_FAMILY_STATUS', 'NAME_HOUSING_TYPE', 'NAME_INCOME_TYPE',
+    'NAME_TYPE_SUITE', 'OCCUPATION_TYPE', 'ORGANIZATION_TYPE',
+    # Most important features
+    'AMT_ANNUITY', 'AMT_CREDIT', 'EXT_SOURCE_1', 'EXT_SOURCE_2', 'EXT_SOURCE_3',
+]
+
+PROJECTIONS = {
+    "app": {"dashboard": DASHBOARD_APP_COLUMNS},
+    "credit_score": {"dashboard": ['SK_ID_CURR', 'Credit Score']},
+}
+
+# Criteria the similar clients of a client can be found by,
+# the same as the dashboard's comparison filters
+
+SIMILARITY_RANGE_CRITERIA = ['DAYS_BIRTH', 'AMT_INCOME_TOTAL']
+SIMILARITY_CATEGORICAL_CRITERIA = [
+    'NAME_CONTRACT_TYPE', 'NAME_EDUCATION_TYPE', 'NAME_HOUSING_TYPE',
+    'NAME_FAMILY_STATUS', 'NAME_INCOME_TYPE', 'OCCUPATION_TYPE',
+]
+SIMILARITY_CRITERIA = SIMILARITY_RANGE_CRITERIA + SIMILARITY_CATEGORICAL_CRITERIA
+
+# Features the dashboard compares a client with the best, average and worst
+# clients on, by group, and the DAYS_* columns the durations in years come from
+
+COMPARISON_FEATURES = {
+    'days': ['YEARS AT CURRENT JOB', 'AGE'],
+    'amt': ['AMT_ANNUITY', 'AMT_CREDIT'],
+    'ext': ['EXT_SOURCE_3', 'EXT_SOURCE_2', 'EXT_SOURCE_1'],
+}
+COMPARISON_DAYS_COLUMNS = {
+    'YEARS AT CURRENT JOB': 'DAYS_EMPLOYED',
+    'AGE': 'DAYS_BIRTH',
+}
+# Credit Score margin from the lowest (best) and highest (worst) scores
+# of a population defining its best and worst clients
+COMPARISON_SCORE_MARGIN = 25
+
+def load_table(name):
+    '''
+        Load one of the tables in TABLE_FILES along with its index,
+        versioned by the hash of its .csv file
+    '''
+    file_path = os.path.join(data_dir, TABLE_FILES[name])
+    digest = file_hash(file_path)
+    last_modified = datetime.fromtimestamp(os.path.getmtime(file_path), tz=timezone.utc)
+    key = CLIENT_JOINS[name][1] if name in CLIENT_JOINS else "SK_ID_CURR"
+    return Table(name, load_csv_file(file_path, digest, chunked=name in chunked_tables, key=key),
+                 version=digest[:16], last_modified=last_modified, key=key)
+
+def table_version(name):
+    '''
+        Return the version of the data of one of the tables in TABLE_FILES
+        available in its .csv file, without loading it
+    '''
+    return file_hash(os.path.join(data_dir, TABLE_FILES[name]))[:16]
+
+def client_index(name):
+    '''
+        Return the per-client index of one of the tables in TABLE_FILES.
+        The index of the tables in CLIENT_JOINS is joined through their
+        linking table, once per version of the linking table.
+    '''
+    table = TABLES[name]
+    if name not in CLIENT_JOINS:
+        return table.index
+
+    link_name, key = CLIENT_JOINS[name]
+    link_table = TABLES[link_name]
+    return table.derived(("client_index", link_table.version),
+                         lambda table: JoinIndex(link_table.index, table.index, key))
+
+def client_tables(names):
+    '''
+        Return the given tables along with the tables
+        linking them to clients (see CLIENT_JOINS)
+    '''
+    linked = []
+    for name in names:
+        linked.append(name)
+        if name in CLIENT_JOINS:
+            linked.append(CLIENT_JOINS[name][0])
+    return list(dict.fromkeys(linked))
+
+def build_client_joins(name, *tables):
+    '''
+        Build the join index of the tables in CLIENT_JOINS once both
+        tables are loaded, and again for every new version of either
+    '''
+    for joined_name, (link_name, _) in CLIENT_JOINS.items():
+        if name in (joined_name, link_name) and TABLES.is_ready([joined_name, link_name]):
+            client_index(joined_name)
+
+def parse_table_list(value):
+    '''
+        Parse a comma separated list of table names,
+        where "all" and "none" stand for every and no table
+    '''
+    value = value.strip().lower()
+    if value == 'all':
+        return list(TABLE_FILES)
+    if value in ('', 'none'):
+        return []
+
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in TABLE_FILES]
+    if unknown:
+        raise ValueError(f"Unknown tables: {', '.join(unknown)}")
+    return names
+
+TABLES = TableRegistry(blocking=not background_loading)
+for table_name in TABLE_FILES:
+    TABLES.register(table_name, partial(load_table, table_name), version=partial(table_version, table_name))
+TABLES.on_load(build_client_joins)
+
+preload_tables = parse_table_list(os.getenv('PRELOAD_TABLES', 'all'))
+chunked_tables = parse_table_list(os.getenv('CHUNKED_TABLES', 'installments,bureau_balance,cash'))
+ready_tables = parse_table_list(os.getenv('READY_TABLES', ','.join(preload_tables) or 'none'))
+
+# Reloads requested through /admin/reload, carried out by every worker,
+# and new versions of the files. Both are tracked from before the tables
+# are loaded, so that the changes made while they load are applied afterwards.
+RELOAD_REQUESTS = ReloadRequests(TABLES, os.path.join(cache_dir, 'reload_requests.json'))
+
+DATASET_WATCHER = DatasetWatcher(TABLES, {name: os.path.join(data_dir, file_name)
+                                          for name, file_name in TABLE_FILES.items()},
+                                 interval=reload_interval)
+
+# In the background, the preloaded tables are loaded once the server
+# listens (see start_background_tasks), and the routes needing a table that is
+# not loaded yet answer 503. Otherwise they are loaded right away.
+if not background_loading:
+    print("Loading training data into dataframes...")
+    TABLES.preload(preload_tables)
+    print("Training data loaded.")
+
+RESPONSE_CACHE = ResponseCache(max_bytes=int(response_cache_mb * 2**20))
+BULK_CACHE = ResponseCache(max_bytes=int(bulk_cache_mb * 2**20))
+
+def discard_previous_version(name, previous, new):
+    '''
+        Free the cached responses and the derived structures
+        built from the previous version of a reloaded table
+    '''
+    # The per-client responses of a table are also keyed by
+    # the version of the table linking it to clients, if any
+    RESPONSE_CACHE.discard(lambda key: previous.version in key)
+    BULK_CACHE.discard(lambda key: key[0] == name and previous.version in key)
+    for table_name in TABLES:
+        if TABLES.is_loaded(table_name):
+            TABLES[table_name].discard_derived(lambda key: isinstance(key, tuple) and previous.version in key)
+
+TABLES.on_swap(discard_previous_version)
+TABLES.on_swap(build_client_joins)
+
+def start_background_tasks():
+    '''
+        Start loading the preloaded tables in the background, and watching
+        for new versions of the data, in the process serving the requests
+    '''
+    if background_loading:
+        print("Loading training data into dataframes in the background...")
+        TABLES.load_in_background(preload_tables)
+    RELOAD_REQUESTS.start()
+    METRICS.start()
+    if reload_interval > 0:
+        DATASET_WATCHER.start()
 
-SAVED_APP_DATA = load_csv_file(os.path.join(data_dir, "application_test.csv"))
-SAVED_BUREAU_DATA = load_csv_file(os.path.join(data_dir, "bureau.csv"))
-SAVED_BUREAU_BALANCE_DATA = load_csv_file(os.path.join(data_dir, "bureau_balance.csv"))
-SAVED_CASH_DATA = load_csv_file(os.path.join(data_dir, "POS_CASH_balance.csv"))
-SAVED_CARD_DATA = load_csv_file(os.path.join(data_dir, "credit_card_balance.csv"))
-SAVED_INSTALLMENTS_DATA = load_csv_file(os.path.join(data_dir, "installments_payments.csv"))
-SAVED_PREV_APP_DATA = load_csv_file(os.path.join(data_dir, "previous_application.csv"))
-CREDIT_SCORE_DATA = load_csv_file(os.path.join(data_dir, "predictions_test.csv"))
-print("Training data loaded.")
+METRICS = RequestMetrics(shared_dir=metrics_dir)
+METRICS.share("client_responses", RESPONSE_CACHE.stats, gauges=("entries", "size", "max_size"))
+METRICS.share("bulk_responses", BULK_CACHE.stats, gauges=("entries", "size", "max_size"))
 
-# Loading the model 
+# The metrics published by the workers of an earlier server are not ours
+if metrics_dir:
+    for f in os.listdir(metrics_dir) if os.path.isdir(metrics_dir) else []:
+        if f.endswith('.json'):
+            os.remove(os.path.join(metrics_dir, f))
 
-# print("Loading model...")
+# None when profiling is disabled, so that requests go through no profiling code at all
+PROFILER = RequestProfiler(profile_dir, profile_sample_rate, profile_max_files) if use_profiling else None
 
-# MODEL = load(data_dir+"lgbm_trained_model_whole_dataset.joblib")
+# The model used to score clients online, loaded the first time
+# a client is scored unless PRELOAD_MODEL is set
 
-# print("Model loaded.")
+SCORING_MODEL = ScoringModel(model_path)
+SCORING_BATCHER = MicroBatcher(SCORING_MODEL.predict,
+                               max_batch_size=scoring_batch_size,
+                               max_wait=scoring_batch_wait_ms / 1000)
+METRICS.share("scoring", SCORING_BATCHER.counts, gauges=("queue_depth",))
 
+if preload_model:
+    SCORING_MODEL.load()
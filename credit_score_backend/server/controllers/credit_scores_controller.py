@@ -1,9 +1,12 @@
 
 from flask import Flask, abort, jsonify
 
-from server.controllers import CREDIT_SCORE_DATA
+from server.controllers import TABLES
+from server.controllers.responses import bulk_response, cached_client_response, conditional, frame_response, requested_columns
 
 
+@conditional(["credit_score"])
+@cached_client_response("credit_score")
 def get_client_credit_score(client_id):  # noqa: E501
     """Get credit score of a client by ID
 
@@ -17,13 +20,15 @@ def get_client_credit_score(client_id):  # noqa: E501
     if not isinstance(client_id, int):
         abort(400, "Supplied ID is not an integer")
 
-    if client_id not in CREDIT_SCORE_DATA["SK_ID_CURR"].values:
+    client_index = TABLES["credit_score"].index
+
+    if client_id not in client_index:
         abort(404, "Client not found")
 
-    client_data = CREDIT_SCORE_DATA[CREDIT_SCORE_DATA["SK_ID_CURR"] == client_id].to_json(orient="records")
-    return jsonify(client_data)
+    return frame_response(client_index.rows(client_id, columns=requested_columns("credit_score")))
 
 
+@conditional(["credit_score"])
 def get_clients_credit_score():  # noqa: E501
     """Get the credit scores of all clients
 
@@ -31,4 +36,4 @@ def get_clients_credit_score():  # noqa: E501
 
     :rtype: CreditScores
     """
-    return CREDIT_SCORE_DATA.to_json(orient="records")
+    return bulk_response("credit_score")
@@ -0,0 +1,160 @@
+import io
+
+import numpy as np
+
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+ARROW = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+MSGPACK = "application/msgpack"
+
+# Formats a table can be served in, JSON first as the default
+TABLE_FORMATS = [JSON, ARROW, PARQUET, MSGPACK]
+BULK_FORMATS = [JSON, NDJSON, ARROW, PARQUET, MSGPACK]
+
+# Formats a document (a dict of values) can be served in
+DOCUMENT_FORMATS = [JSON, MSGPACK]
+
+
+def _msgpack_default(value):
+    '''
+        Convert the numpy scalars msgpack does not know about
+    '''
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot serialize {type(value)}")
+
+def frame_records(frame):
+    '''
+        Return the rows of a df as a list of dicts, with None for the
+        missing values (NaN, also in text and category columns), as in
+        the other formats
+    '''
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+
+def pack_msgpack(obj):
+    import msgpack
+    return msgpack.packb(obj, default=_msgpack_default)
+
+def encode_frame(frame, mimetype):
+    '''
+        Serialize a df as a whole in the given format
+    '''
+    if mimetype == ARROW:
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    if mimetype == PARQUET:
+        buffer = io.BytesIO()
+        frame.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+
+    if mimetype == MSGPACK:
+        return pack_msgpack(frame_records(frame))
+
+    return frame.to_json(orient="records")
+
+def stream_frame(frame, mimetype, chunk_rows, columns=None):
+    '''
+        Serialize a df chunk by chunk in the given format, so that
+        the whole document is never held in memory at once.
+
+        Only the given columns are serialized, if any.
+    '''
+    column_positions = None if columns is None else frame.columns.get_indexer(columns)
+
+    def select(rows):
+        if column_positions is None:
+            return frame.iloc[rows]
+        return frame.iloc[rows, column_positions]
+
+    chunks = (select(slice(start, start + chunk_rows)) for start in range(0, len(frame), chunk_rows))
+    head = select(slice(0, 0))
+
+    if mimetype == ARROW:
+        yield from _stream_arrow(head, chunks)
+    elif mimetype == PARQUET:
+        yield from _stream_parquet(head, chunks)
+    elif mimetype == MSGPACK:
+        yield from _stream_msgpack(len(frame), chunks)
+    elif mimetype == NDJSON:
+        for chunk in chunks:
+            yield chunk.to_json(orient="records", lines=True).rstrip('\n') + '\n'
+    else:
+        yield from _stream_json(chunks)
+
+def _stream_json(chunks):
+    yield '['
+    for i, chunk in enumerate(chunks):
+        # Strip the brackets of each chunk's array and chain them
+        records = chunk.to_json(orient="records")[1:-1]
+        yield records if i == 0 else ',' + records
+    yield ']'
+
+def _stream_arrow(head, chunks):
+    import pyarrow as pa
+
+    schema = pa.Schema.from_pandas(head, preserve_index=False)
+    sink = _StreamSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for chunk in chunks:
+            writer.write_batch(pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()
+
+def _stream_parquet(head, chunks):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(head, preserve_index=False)
+    sink = _StreamSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        # Each chunk is written as a row group
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()
+
+def _stream_msgpack(n_rows, chunks):
+    import msgpack
+
+    packer = msgpack.Packer(default=_msgpack_default)
+    yield packer.pack_array_header(n_rows)
+    for chunk in chunks:
+        yield b''.join(packer.pack(record) for record in frame_records(chunk))
+
+
+class _StreamSink(io.RawIOBase):
+    '''
+        Write-only file handing out what was written to it chunk by chunk,
+        while reporting the position of the whole stream to the writer
+    '''
+
+    def __init__(self):
+        self._pending = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._pending.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        '''
+            Return what has been written since the last call
+        '''
+        data = b''.join(self._pending)
+        self._pending = []
+        return data
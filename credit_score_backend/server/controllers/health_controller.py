@@ -0,0 +1,35 @@
+from flask import jsonify
+from werkzeug.exceptions import ServiceUnavailable
+
+from server.controllers import TABLES, ready_tables, retry_after
+
+
+def get_liveness():  # noqa: E501
+    """Tell whether the server is alive
+
+    Answers as soon as the server listens, whether the tables are loaded or not # noqa: E501
+
+    :rtype: Liveness
+    """
+    return jsonify({"status": "alive"})
+
+def get_readiness():  # noqa: E501
+    """Tell whether the server is ready to serve requests
+
+    Returns the loading state of every table, with a 503 status until the tables
+    listed in READY_TABLES are loaded # noqa: E501
+
+    :rtype: Readiness
+    """
+    ready = TABLES.is_ready(ready_tables)
+    response = jsonify({"ready": ready, "tables": TABLES.status()})
+    if not ready:
+        response.status_code = 503
+        response.headers["Retry-After"] = str(retry_after)
+    return response
+
+def table_not_ready(error):
+    '''
+        Answer the requests needing a table that is not loaded yet
+    '''
+    return ServiceUnavailable(str(error), retry_after=retry_after)
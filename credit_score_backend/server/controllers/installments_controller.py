@@ -1,6 +1,9 @@
 from flask import Flask, abort, jsonify
-from server.controllers import SAVED_INSTALLMENTS_DATA
+from server.controllers import TABLES
+from server.controllers.responses import bulk_response, cached_client_response, conditional, frame_response, requested_columns
 
+@conditional(["installments"])
+@cached_client_response("installments")
 def get_client_installment_info(client_id):  # noqa: E501
     """Get a client's installment information by ID
 
@@ -14,12 +17,14 @@ def get_client_installment_info(client_id):  # noqa: E501
     if not isinstance(client_id, int):
         abort(400, "Supplied ID is not an integer")
 
-    if client_id not in SAVED_INSTALLMENTS_DATA["SK_ID_CURR"].values:
+    client_index = TABLES["installments"].index
+
+    if client_id not in client_index:
         abort(404, "Client not found")
 
-    client_data = SAVED_INSTALLMENTS_DATA[SAVED_INSTALLMENTS_DATA["SK_ID_CURR"] == client_id].to_json(orient="records")
-    return jsonify(client_data)
+    return frame_response(client_index.rows(client_id, columns=requested_columns("installments")))
 
+@conditional(["installments"])
 def get_clients_installment_info():  # noqa: E501
     """Get all clients' installment information
 
@@ -27,4 +32,4 @@ def get_clients_installment_info():  # noqa: E501
 
     :rtype: MultipleInstallmentInformation
     """
-    return jsonify(SAVED_INSTALLMENTS_DATA.to_json(orient="records"))
\ No newline at end of file
+    return bulk_response("installments")
\ No newline at end of file
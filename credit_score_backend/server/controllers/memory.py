@@ -0,0 +1,44 @@
+import resource
+
+
+def _status_bytes(field):
+    '''
+        Read a memory field of /proc/self/status, None where unavailable
+    '''
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def current_rss():
+    '''
+        Resident memory of the process, in bytes
+    '''
+    return _status_bytes('VmRSS')
+
+def peak_rss():
+    '''
+        Peak resident memory of the process since it started,
+        or since the last call to reset_peak_rss, in bytes
+    '''
+    peak = _status_bytes('VmHWM')
+    if peak is None:
+        # ru_maxrss is in kilobytes on Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return peak
+
+def reset_peak_rss():
+    '''
+        Reset the peak resident memory of the process to its current
+        resident memory, where the kernel allows it (Linux 4.0+)
+    '''
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,369 @@
+from bisect import bisect_left
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from flask import has_request_context, request
+
+
+# Upper bounds of the request latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+ROUTE_KEY = "credit_score.route"
+PHASES_KEY = "credit_score.phases"
+
+
+def current_phases():
+    '''
+        Return the phase durations of the current request,
+        or None outside of a metered request
+    '''
+    if not has_request_context():
+        return None
+    return request.environ.get(PHASES_KEY)
+
+def add_phase_time(phases, name, duration):
+    phases[name] = phases.get(name, 0.0) + duration
+
+
+class _PhaseTimer:
+
+    __slots__ = ('name', 'phases', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.phases = current_phases()
+        if self.phases is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.phases is not None:
+            add_phase_time(self.phases, self.name, time.perf_counter() - self.start)
+
+def timed(name):
+    '''
+        Context manager adding the time spent in its block
+        to the named phase of the current request, if any
+    '''
+    return _PhaseTimer(name)
+
+def timed_chunks(chunks, name):
+    '''
+        Add the time spent producing each chunk of a stream to the named
+        phase of the request it was created in. The stream is usually
+        consumed after the controller returned, out of the request context.
+    '''
+    phases = current_phases()
+    if phases is None:
+        return chunks
+    return _timed_chunks(iter(chunks), name, phases)
+
+def _timed_chunks(chunks, name, phases):
+    # Time spent in nested timed streams (serializing the chunks being
+    # compressed...) is only counted in their own phase
+    while True:
+        nested = sum(phases.values())
+        start = time.perf_counter()
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            chunk = None
+        duration = time.perf_counter() - start - (sum(phases.values()) - nested)
+        add_phase_time(phases, name, duration)
+        if chunk is None:
+            return
+        yield chunk
+
+def format_metric(name, kind, description, samples):
+    '''
+        Format a metric family in the Prometheus text format,
+        samples being (suffix, labels, value) tuples
+    '''
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+    for suffix, labels, value in samples:
+        label_text = ','.join(f'{key}="{_escape(str(label))}"' for key, label in labels.items())
+        lines.append(f"{name}{suffix}{{{label_text}}} {_format_value(value)}" if labels
+                     else f"{name}{suffix} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _RouteStats:
+
+    __slots__ = ('buckets', 'latency_sum', 'count', 'response_bytes', 'statuses', 'phases')
+
+    def __init__(self, n_buckets):
+        self.buckets = [0] * (n_buckets + 1)
+        self.latency_sum = 0.0
+        self.count = 0
+        self.response_bytes = 0
+        self.statuses = {}
+        self.phases = {}
+
+    def to_dict(self):
+        return {
+            'buckets': list(self.buckets),
+            'latency_sum': self.latency_sum,
+            'count': self.count,
+            'response_bytes': self.response_bytes,
+            # JSON object keys are strings
+            'statuses': {str(status): count for status, count in self.statuses.items()},
+            'phases': dict(self.phases),
+        }
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _add_counts(total, counts):
+    '''
+        Add the numbers of a (nested) dict of counts to another
+    '''
+    for key, value in counts.items():
+        if isinstance(value, dict):
+            _add_counts(total.setdefault(key, {}), value)
+        elif isinstance(value, list):
+            current = total.setdefault(key, [0] * len(value))
+            total[key] = [a + b for a, b in zip(current, value)]
+        else:
+            total[key] = total.get(key, 0) + value
+
+
+class RequestMetrics:
+    '''
+        Per-route request metrics of the app, measured around the WSGI app:
+        latency from the start of the request to the end of its response
+        stream, response bytes, status codes, and the time spent in each
+        phase of the request (lookup, slicing, serialization, compression),
+        as reported by the timed blocks of the data path.
+
+        Each worker process of the server keeps its own metrics. Once
+        started, a process publishes them to a file of shared_dir every
+        interval seconds, along with the counters shared with share(), and
+        the metrics of all the processes are summed when rendered, so that
+        a scrape reports the whole server whichever worker answers it. The
+        counters of the workers that stopped are kept, so that the totals
+        never go down, but not their gauges.
+    '''
+
+    def __init__(self, buckets=LATENCY_BUCKETS, shared_dir=None, interval=1.0):
+        self.buckets = buckets
+        self.shared_dir = shared_dir
+        self.interval = interval
+        self._routes = {}
+        self._shared = {}
+        self._gauges = {}
+        self._temporary_dir = None
+        self._lock = threading.Lock()
+        self._changes = 0
+        self._path = None
+        self._thread = None
+
+    def share(self, name, collect, gauges=()):
+        '''
+            Publish the dict of counts returned by collect() along with the
+            request metrics, to be summed over the processes by merged_state.
+            The gauges are the counts only summed over the running processes.
+        '''
+        self._shared[name] = collect
+        self._gauges[name] = gauges
+
+    def make_shared_dir(self):
+        '''
+            Make a temporary shared_dir for the processes forked from this
+            one, unless one is set, to be removed by remove_shared_dir
+        '''
+        if self.shared_dir is None:
+            self.shared_dir = self._temporary_dir = tempfile.mkdtemp(prefix='credit_score_metrics_')
+
+    def remove_shared_dir(self):
+        if self._temporary_dir is not None:
+            shutil.rmtree(self._temporary_dir, ignore_errors=True)
+            self.shared_dir = self._temporary_dir = None
+
+    def start(self):
+        '''
+            Start publishing the metrics of this process, once it serves requests
+        '''
+        if self.shared_dir is None or (self._thread is not None and self._thread.is_alive()):
+            return
+        os.makedirs(self.shared_dir, exist_ok=True)
+        # Named after this process, and after its start in case its pid gets reused
+        self._path = os.path.join(self.shared_dir, f"{os.getpid()}-{time.time_ns()}.json")
+        self._thread = threading.Thread(target=self._run, name="metrics-publisher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        published = None
+        while True:
+            time.sleep(self.interval)
+            if self._changes != published:
+                published = self._changes
+                try:
+                    self.publish()
+                except OSError as e:
+                    print(f"Could not publish the metrics: {e}")
+
+    def _state(self):
+        with self._lock:
+            routes = {route: stats.to_dict() for route, stats in self._routes.items()}
+        return {'routes': routes, 'shared': {name: collect() for name, collect in self._shared.items()}}
+
+    def publish(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.shared_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._state(), f)
+            os.replace(tmp_path, self._path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def merged_state(self):
+        '''
+            Sum the current metrics of this process with the last ones
+            published by the other processes, the shared counts being
+            under 'shared', by name
+        '''
+        total = self._state()
+        if self.shared_dir is None:
+            return total
+
+        try:
+            names = [name for name in os.listdir(self.shared_dir) if name.endswith('.json')]
+        except OSError:
+            return total
+        for name in names:
+            path = os.path.join(self.shared_dir, name)
+            if path == self._path:
+                continue
+            try:
+                with open(path) as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            # Files are named after the pid of their process
+            if not _is_running(int(name.split('-')[0])):
+                for shared, counts in state['shared'].items():
+                    for gauge in self._gauges.get(shared, ()):
+                        counts.pop(gauge, None)
+            _add_counts(total, state)
+        return total
+
+    def init_app(self, app):
+        app.before_request(self._mark_route)
+        app.wsgi_app = self._wrap(app.wsgi_app)
+
+    @staticmethod
+    def _mark_route():
+        request.environ[ROUTE_KEY] = request.endpoint or "unmatched"
+
+    def _wrap(self, wsgi_app):
+        def metered_app(environ, start_response):
+            start = time.perf_counter()
+            environ[PHASES_KEY] = {}
+            status = []
+
+            def metered_start_response(status_line, headers, exc_info=None):
+                status[:] = [int(status_line[:3])]
+                return start_response(status_line, headers, exc_info)
+
+            def on_close(size):
+                self.record(environ.get(ROUTE_KEY, "unmatched"), status[0] if status else 500,
+                            time.perf_counter() - start, size, environ[PHASES_KEY])
+
+            return _MeteredBody(wsgi_app(environ, metered_start_response), on_close)
+        return metered_app
+
+    def record(self, route, status, latency, size, phases):
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = _RouteStats(len(self.buckets))
+
+            stats.buckets[bisect_left(self.buckets, latency)] += 1
+            stats.latency_sum += latency
+            stats.count += 1
+            stats.response_bytes += size
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            for name, duration in phases.items():
+                stats.phases[name] = stats.phases.get(name, 0.0) + duration
+            self._changes += 1
+
+    def render(self, state=None):
+        '''
+            Format the request metrics of all the processes
+            (or of the given merged state) in the Prometheus text format
+        '''
+        state = state or self.merged_state()
+
+        latency = []
+        requests = []
+        response_bytes = []
+        phases = []
+        for route, stats in sorted(state['routes'].items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), stats['buckets']):
+                cumulative += count
+                latency.append(("_bucket", {"route": route, "le": bound}, cumulative))
+            latency.append(("_sum", {"route": route}, stats['latency_sum']))
+            latency.append(("_count", {"route": route}, stats['count']))
+
+            requests.extend(("", {"route": route, "status": status}, count)
+                            for status, count in sorted(stats['statuses'].items(), key=lambda item: int(item[0])))
+            response_bytes.append(("", {"route": route}, stats['response_bytes']))
+            phases.extend(("", {"route": route, "phase": name}, duration)
+                          for name, duration in sorted(stats['phases'].items()))
+
+        return ''.join([
+            format_metric("credit_score_request_duration_seconds", "histogram",
+                          "Time from the start of a request to the end of its response", latency),
+            format_metric("credit_score_requests_total", "counter",
+                          "Requests served, by route and status code", requests),
+            format_metric("credit_score_response_bytes_total", "counter",
+                          "Bytes of response bodies sent, by route", response_bytes),
+            format_metric("credit_score_request_phase_seconds_total", "counter",
+                          "Time spent in each phase of the requests, by route", phases),
+        ])
+
+
+class _MeteredBody:
+    '''
+        WSGI response body counting the bytes sent, and reporting
+        them once the server closes it at the end of the response
+    '''
+
+    def __init__(self, body, on_close):
+        self._body = body
+        self._on_close = on_close
+        self.size = 0
+
+    def __iter__(self):
+        for chunk in self._body:
+            self.size += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            if hasattr(self._body, 'close'):
+                self._body.close()
+        finally:
+            self._on_close(self.size)
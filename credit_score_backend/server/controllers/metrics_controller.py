@@ -0,0 +1,97 @@
+from flask import Response
+
+from server.controllers import TABLES, METRICS, SCORING_BATCHER
+from server.controllers.metrics import format_metric
+
+
+def table_memory_usage(table):
+    return int(table.frame.memory_usage(deep=True).sum())
+
+def table_metrics():
+    '''
+        Format the row counts and memory usage of the loaded tables
+    '''
+    loaded = []
+    rows = []
+    memory = []
+    load_seconds = []
+    peak_rss = []
+    for name, status in TABLES.status().items():
+        is_loaded = status["state"] == "loaded"
+        loaded.append(("", {"table": name}, int(is_loaded)))
+        if is_loaded:
+            load_seconds.append(("", {"table": name}, status["load_seconds"]))
+            if status["peak_rss_bytes"] is not None:
+                peak_rss.append(("", {"table": name}, status["peak_rss_bytes"]))
+            table = TABLES[name]
+            rows.append(("", {"table": name}, len(table.frame)))
+            # Measured once per version of the data, as deep measures scan every string
+            memory.append(("", {"table": name}, table.derived("memory_usage", table_memory_usage)))
+
+    return ''.join([
+        format_metric("credit_score_table_loaded", "gauge", "Whether the table is loaded", loaded),
+        format_metric("credit_score_table_rows", "gauge", "Rows of the loaded tables", rows),
+        format_metric("credit_score_table_memory_bytes", "gauge", "Memory used by the loaded tables", memory),
+        format_metric("credit_score_table_load_seconds", "gauge", "Time it took to load the loaded tables", load_seconds),
+        format_metric("credit_score_table_load_peak_rss_bytes", "gauge",
+                      "Peak resident memory of the process while the loaded tables were loaded", peak_rss),
+    ])
+
+def cache_metrics(shared):
+    '''
+        Format the counters and hit ratios of the response caches,
+        summed over the worker processes (see RequestMetrics.share)
+    '''
+    caches = {name: shared.get(name, {}) for name in ("client_responses", "bulk_responses")}
+
+    def samples(field):
+        return [("", {"cache": name}, stats.get(field, 0)) for name, stats in caches.items()]
+
+    ratios = [("", {"cache": name}, stats["hits"] / (stats["hits"] + stats["misses"])
+               if stats.get("hits", 0) + stats.get("misses", 0) else 0.0)
+              for name, stats in caches.items()]
+
+    return ''.join([
+        format_metric("credit_score_cache_hits_total", "counter", "Response cache hits", samples("hits")),
+        format_metric("credit_score_cache_misses_total", "counter", "Response cache misses", samples("misses")),
+        format_metric("credit_score_cache_evictions_total", "counter", "Response cache evictions", samples("evictions")),
+        format_metric("credit_score_cache_hit_ratio", "gauge", "Share of response cache lookups that hit", ratios),
+        format_metric("credit_score_cache_entries", "gauge", "Responses held in cache", samples("entries")),
+        format_metric("credit_score_cache_size_bytes", "gauge", "Size of the responses held in cache", samples("size")),
+    ])
+
+def scoring_metrics(shared):
+    '''
+        Format the micro-batches of the scoring routes,
+        summed over the worker processes (see MicroBatcher.counts)
+    '''
+    counts = shared.get("scoring", {})
+
+    batch_sizes = []
+    cumulative = 0
+    for bound, count in zip(SCORING_BATCHER.batch_size_buckets, counts.get("batch_sizes", [])):
+        cumulative += count
+        batch_sizes.append(("_bucket", {"le": bound}, cumulative))
+    batch_sizes.append(("_bucket", {"le": "+Inf"}, counts.get("batches", 0)))
+    batch_sizes.append(("_sum", {}, counts.get("rows", 0)))
+    batch_sizes.append(("_count", {}, counts.get("batches", 0)))
+
+    return ''.join([
+        format_metric("credit_score_scoring_batch_size", "histogram",
+                      "Rows scored together by a single call to the model", batch_sizes),
+        format_metric("credit_score_scoring_queue_depth", "gauge",
+                      "Scoring requests waiting for their batch", [("", {}, counts.get("queue_depth", 0))]),
+    ])
+
+
+def get_metrics():  # noqa: E501
+    """Get the metrics of the server
+
+    Returns the request latency histograms, response sizes and time spent per phase of each route,
+    the size of the loaded tables, the response cache counters and the scoring batches, in the Prometheus text format # noqa: E501
+
+    :rtype: str
+    """
+    state = METRICS.merged_state()
+    body = METRICS.render(state) + table_metrics() + cache_metrics(state["shared"]) + scoring_metrics(state["shared"])
+    return Response(body, content_type="text/plain; version=0.0.4; charset=utf-8")
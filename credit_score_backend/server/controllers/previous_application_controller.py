@@ -1,8 +1,11 @@
 from flask import Flask, abort, jsonify
 
-from server.controllers import SAVED_PREV_APP_DATA
+from server.controllers import TABLES
+from server.controllers.responses import bulk_response, cached_client_response, conditional, frame_response, requested_columns
 
 
+@conditional(["previous_app"])
+@cached_client_response("previous_app")
 def get_client_previous_app_info(client_id):  # noqa: E501
     """Get a client&#x27;s banking information by ID
 
@@ -17,12 +20,15 @@ def get_client_previous_app_info(client_id):  # noqa: E501
     if not isinstance(client_id, int):
         abort(400, "Supplied ID is not an integer")
 
-    if client_id not in SAVED_PREV_APP_DATA["SK_ID_CURR"].values:
+    client_index = TABLES["previous_app"].index
+
+    if client_id not in client_index:
         abort(404, "Client not found")
 
-    return SAVED_PREV_APP_DATA[SAVED_PREV_APP_DATA["SK_ID_CURR"]==client_id].to_json(orient="records")
+    return frame_response(client_index.rows(client_id, columns=requested_columns("previous_app")))
 
 
+@conditional(["previous_app"])
 def get_clients_previous_app_info():  # noqa: E501
     """Get all clients&#x27; bureau information
 
@@ -31,4 +37,4 @@ def get_clients_previous_app_info():  # noqa: E501
 
     :rtype: MultiplePreviousApplicationInformation
     """
-    return SAVED_PREV_APP_DATA.to_json(orient="records")
+    return bulk_response("previous_app")
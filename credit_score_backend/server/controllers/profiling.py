@@ -0,0 +1,115 @@
+import cProfile
+from datetime import datetime, timezone
+import os
+import random
+import re
+import threading
+import time
+
+
+class RequestProfiler:
+    '''
+        Profiles selected requests with cProfile, from the start of the
+        request to the end of its response stream, and saves their
+        statistics as pstats files in profile_dir.
+
+        A request is profiled when it carries the X-Profile header, or
+        at random for a share sample_rate of the requests. One request
+        is profiled at a time, the others being served as usual. Only
+        the max_files most recent profiles are kept.
+    '''
+
+    HEADER_KEY = "HTTP_X_PROFILE"
+
+    def __init__(self, profile_dir, sample_rate=0.0, max_files=100):
+        self.profile_dir = profile_dir
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        app.wsgi_app = self._wrap(app.wsgi_app)
+
+    def _selected(self, environ):
+        if environ.get(self.HEADER_KEY, '0') not in ('', '0'):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _wrap(self, wsgi_app):
+        def profiled_app(environ, start_response):
+            if not self._selected(environ) or not self._lock.acquire(blocking=False):
+                return wsgi_app(environ, start_response)
+
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            try:
+                profile.enable()
+                try:
+                    body = wsgi_app(environ, start_response)
+                finally:
+                    profile.disable()
+            except BaseException:
+                self._lock.release()
+                raise
+
+            def on_close():
+                try:
+                    self._save(profile, environ, time.perf_counter() - start)
+                finally:
+                    self._lock.release()
+
+            return _ProfiledBody(body, profile, on_close)
+        return profiled_app
+
+    def _save(self, profile, environ, duration):
+        path = re.sub(r'[^A-Za-z0-9]+', '_', environ.get('PATH_INFO', '')).strip('_') or 'root'
+        timestamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+        name = f"{timestamp}-{environ.get('REQUEST_METHOD', 'GET')}-{path[:80]}-{duration * 1000:.0f}ms.prof"
+        profile.dump_stats(os.path.join(self.profile_dir, name))
+
+        for old_name in self.profiles()[self.max_files:]:
+            try:
+                os.remove(os.path.join(self.profile_dir, old_name))
+            except OSError:
+                pass
+
+    def profiles(self):
+        '''
+            Names of the saved profiles, most recent first
+        '''
+        try:
+            names = [name for name in os.listdir(self.profile_dir) if name.endswith('.prof')]
+        except OSError:
+            return []
+        return sorted(names, reverse=True)
+
+
+class _ProfiledBody:
+    '''
+        WSGI response body profiled while the server iterates over it
+    '''
+
+    def __init__(self, body, profile, on_close):
+        self._body = body
+        self._profile = profile
+        self._on_close = on_close
+
+    def __iter__(self):
+        chunks = iter(self._body)
+        while True:
+            self._profile.enable()
+            try:
+                chunk = next(chunks, None)
+            finally:
+                self._profile.disable()
+            if chunk is None:
+                return
+            yield chunk
+
+    def close(self):
+        try:
+            if hasattr(self._body, 'close'):
+                self._body.close()
+        finally:
+            self._on_close()
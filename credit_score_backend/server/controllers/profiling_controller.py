@@ -0,0 +1,44 @@
+import os
+
+from flask import abort, send_from_directory
+
+from server.controllers import PROFILER
+from server.controllers.responses import document_response
+
+
+def get_profiles():  # noqa: E501
+    """Get the list of request profiles
+
+    Returns the name, size and date of the saved request profiles, most recent first # noqa: E501
+
+    :rtype: RequestProfiles
+    """
+    if PROFILER is None:
+        abort(404, "Profiling is disabled")
+
+    profiles = []
+    for name in PROFILER.profiles():
+        try:
+            stat = os.stat(os.path.join(PROFILER.profile_dir, name))
+        except OSError:
+            continue
+        profiles.append({"name": name, "size": stat.st_size, "created": stat.st_mtime})
+
+    return document_response({"profiles": profiles})
+
+def get_profile(name):  # noqa: E501
+    """Download a request profile by name
+
+    Returns the pstats file of a request profile # noqa: E501
+
+    :param name: Name of the profile
+    :type name: str
+
+    :rtype: file
+    """
+    if PROFILER is None:
+        abort(404, "Profiling is disabled")
+    if name not in PROFILER.profiles():
+        abort(404, "Profile not found")
+
+    return send_from_directory(PROFILER.profile_dir, name, mimetype="application/octet-stream")
@@ -0,0 +1,155 @@
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+def file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+class DatasetWatcher:
+    '''
+        Watches the files the tables are loaded from, and reloads the
+        loaded tables whose file changed.
+
+        Files are polled every interval seconds, and a table is only
+        reloaded once its file stayed the same for a whole interval,
+        so that files still being written are left alone.
+
+        The files are compared with their state when the watcher was
+        created, along with the tables, so that workers forked later
+        from the process that loaded them catch up with the files.
+    '''
+
+    def __init__(self, registry, paths, interval):
+        self.registry = registry
+        self.paths = paths
+        self.interval = interval
+        self._served = {name: file_signature(path) for name, path in paths.items()}
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="dataset-watcher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        served = dict(self._served)
+        seen = dict(served)
+
+        while True:
+            time.sleep(self.interval)
+            for name, path in self.paths.items():
+                signature = file_signature(path)
+                if signature is None or signature == served[name]:
+                    seen[name] = signature
+                    continue
+
+                # Wait for the file to stay the same for a whole interval
+                if signature != seen[name]:
+                    seen[name] = signature
+                    continue
+
+                served[name] = signature
+                if self.registry.is_loaded(name):
+                    self.registry.reload(name)
+
+
+class ReloadRequests:
+    '''
+        Requests to reload tables, shared through a file by the worker
+        processes serving the app, so that a reload requested from one
+        worker is carried out by every worker.
+
+        The file holds the number of the last request, and for each
+        table the number of the last request to reload it. Every process
+        polls the file each interval seconds, and reloads the tables
+        requested since the last request it applied. Workers forked
+        after a request, from the process that loaded the tables before
+        it, reload them as well.
+    '''
+
+    def __init__(self, registry, path, interval=1.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+        # Requests made before the tables were loaded are already applied
+        self.applied = self._read()["request"]
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="reload-requests", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.poll()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"request": 0, "tables": {}}
+
+    def _write(self, requests):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(requests, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _pending(self, requests):
+        return [name for name, request in requests["tables"].items()
+                if request > self.applied and name in self.registry and self.registry.is_loaded(name)]
+
+    def request(self, names):
+        '''
+            Request every process to reload the given tables, and start
+            reloading them (along with the tables of the requests not
+            applied yet) in the background in this process
+        '''
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path + '.lock', 'w') as lock_file:
+                    # Requests made at the same time by other processes
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    requests = self._read()
+                    requests["request"] += 1
+                    requests["tables"].update({name: requests["request"] for name in names})
+                    self._write(requests)
+            except OSError as e:
+                print(f"Could not share the reload of {', '.join(names)} with the other workers: {e}")
+                return self.registry.reload_in_background(names)
+
+            pending = self._pending(requests)
+            self.applied = requests["request"]
+        return self.registry.reload_in_background(pending)
+
+    def poll(self):
+        '''
+            Reload the tables requested since the last applied request
+        '''
+        with self._lock:
+            requests = self._read()
+            if requests["request"] <= self.applied:
+                return
+            pending = self._pending(requests)
+            self.applied = requests["request"]
+
+        for name in pending:
+            self.registry.reload(name)
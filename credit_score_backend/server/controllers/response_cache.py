@@ -0,0 +1,80 @@
+from collections import OrderedDict
+import threading
+
+
+class ResponseCache:
+    '''
+        Bounded LRU cache of serialized responses.
+
+        Entries are evicted, least recently used first, once the
+        total size of the cached bodies exceeds max_bytes.
+    '''
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        '''
+            Return the cached value for key, or None
+        '''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size):
+        '''
+            Cache value under key, size being its weight in bytes
+        '''
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+
+            self._entries[key] = (value, size)
+            self.size += size
+
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def discard(self, predicate):
+        '''
+            Remove the entries whose key satisfies predicate
+        '''
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                self.size -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size": self.size,
+                "max_size": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,238 @@
+from functools import wraps
+import hashlib
+
+from flask import Response, abort, jsonify, make_response, request
+from werkzeug.http import is_resource_modified
+
+from server.controllers.compression import available_encodings, compress_stream
+from server.controllers.config import (TABLES, PROJECTIONS, RESPONSE_CACHE, BULK_CACHE, client_tables,
+                                       stream_chunk_rows, max_page_size, compression_levels)
+from server.controllers.formats import (BULK_FORMATS, DOCUMENT_FORMATS, MSGPACK, TABLE_FORMATS,
+                                        encode_frame, pack_msgpack, stream_frame)
+from server.controllers.metrics import timed, timed_chunks
+
+
+def parse_int_arg(name):
+    '''
+        Read an optional integer query parameter
+    '''
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        abort(400, f"Supplied {name} is not an integer")
+
+def requested_columns(table_name):
+    '''
+        Read the columns to serve from the fields query parameter, a comma
+        separated list of columns of the table and of named projections
+        (see PROJECTIONS). Returns None to serve every column, and
+        rejects the lists selecting none.
+    '''
+    value = request.args.get('fields')
+    if not value:
+        return None
+
+    table_columns = TABLES[table_name].frame.columns
+    projections = PROJECTIONS.get(table_name, {})
+
+    columns = []
+    unknown = []
+    for field in value.split(','):
+        field = field.strip()
+        if field in projections:
+            columns.extend(column for column in projections[field] if column in table_columns)
+        elif field in table_columns:
+            columns.append(field)
+        elif field:
+            unknown.append(field)
+
+    if unknown:
+        abort(400, f"Unknown fields: {', '.join(unknown)}")
+    if not columns:
+        abort(400, f"Supplied fields select no column of {table_name}")
+
+    return list(dict.fromkeys(columns))
+
+def negotiate(formats):
+    '''
+        Pick the format to respond in among formats, from the
+        Accept header of the request, the first one by default
+    '''
+    return request.accept_mimetypes.best_match(formats, default=formats[0])
+
+def negotiate_encoding():
+    '''
+        Pick the encoding to compress the response with from the
+        Accept-Encoding header of the request, None if uncompressed
+    '''
+    return request.accept_encodings.best_match(available_encodings())
+
+def frame_response(frame):
+    '''
+        Serialize a df in the format negotiated with the client
+    '''
+    mimetype = negotiate(TABLE_FORMATS)
+    with timed("serialization"):
+        body = encode_frame(frame, mimetype)
+    return Response(body, mimetype=mimetype)
+
+def document_response(document):
+    '''
+        Serialize a dict in the format negotiated with the client
+    '''
+    with timed("serialization"):
+        if negotiate(DOCUMENT_FORMATS) == MSGPACK:
+            return Response(pack_msgpack(document), mimetype=MSGPACK)
+        return jsonify(document)
+
+def bulk_response(table_name):
+    '''
+        Stream the records of a whole table, or of a page of its clients.
+        The tables in CLIENT_JOINS are paginated by their own key (the
+        bureau loans of bureau_balance) rather than by client, so that
+        their pages hold the same rows, in the same order, as the whole
+        table.
+
+        Query parameters:
+            - limit  : maximum number of clients (or keys) in the page
+            - cursor : last client ID (or key) of the previous page
+            - fields : columns to serve (see requested_columns)
+
+        When more clients remain after the page, the client ID to
+        use as next cursor is sent in the X-Next-Cursor header.
+        Records are sent in the format negotiated with the client,
+        as a JSON array by default, and compressed with gzip or zstd
+        if the client accepts it.
+    '''
+    limit = parse_int_arg('limit')
+    cursor = parse_int_arg('cursor')
+
+    if limit is not None and not 0 < limit <= max_page_size:
+        abort(400, f"Supplied limit must be between 1 and {max_page_size}")
+
+    table = TABLES[table_name]
+    columns = requested_columns(table_name)
+    headers = {}
+
+    if limit is None and cursor is None:
+        frame = table.frame
+    else:
+        index = table.index
+        page_ids, rows = index.page(after=cursor, limit=limit)
+        with timed("slicing"):
+            frame = table.frame.iloc[rows]
+
+        if len(page_ids) and page_ids[-1] != index.client_ids[-1]:
+            headers['X-Next-Cursor'] = str(page_ids[-1])
+
+    mimetype = negotiate(BULK_FORMATS)
+    encoding = negotiate_encoding()
+    headers['Vary'] = 'Accept, Accept-Encoding'
+
+    body = timed_chunks(stream_frame(frame, mimetype, stream_chunk_rows, columns=columns), "serialization")
+
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+        level = compression_levels[encoding]
+
+        if limit is None and cursor is None:
+            # The whole table is compressed once per version of its data,
+            # and later served from BULK_CACHE
+            key = (table_name, table.version, mimetype, encoding, request.args.get('fields'))
+            blob = BULK_CACHE.get(key)
+            if blob is not None:
+                return Response(blob, mimetype=mimetype, headers=headers)
+
+            body = compress_stream(body, encoding, level,
+                                   on_complete=lambda blob: BULK_CACHE.put(key, blob, len(blob)),
+                                   max_size=BULK_CACHE.max_bytes)
+        else:
+            body = compress_stream(body, encoding, level)
+        body = timed_chunks(body, "compression")
+
+    return Response(body, mimetype=mimetype, headers=headers)
+
+def cached_client_response(table_name):
+    '''
+        Serve a per-client controller from RESPONSE_CACHE.
+
+        Successful responses are cached as ready-to-send bytes, keyed by
+        table, client ID, versions of the data of the table and of the table
+        linking it to clients (see CLIENT_JOINS), format and fields, so that
+        a new version of the data never hits the responses of the previous one.
+    '''
+    def decorator(controller):
+        @wraps(controller)
+        def wrapper(client_id):
+            key = (table_name, client_id, *[TABLES[name].version for name in client_tables([table_name])],
+                   negotiate(TABLE_FORMATS), request.args.get('fields'))
+
+            cached = RESPONSE_CACHE.get(key)
+            if cached is not None:
+                body, mimetype = cached
+                return Response(body, mimetype=mimetype)
+
+            response = make_response(controller(client_id))
+            if response.status_code == 200 and not response.is_streamed:
+                body = response.get_data()
+                RESPONSE_CACHE.put(key, (body, response.mimetype), len(body))
+
+            return response
+        return wrapper
+    return decorator
+
+def conditional(table_names, extra_version=None):
+    '''
+        Make a GET controller answer conditional requests.
+
+        The ETag of a response is derived from the versions of the tables
+        it is built from (table_names, or a function of the controller's
+        arguments returning them, and the tables linking them to clients),
+        the optional extra_version function's
+        result, and everything else the response depends on: path, query
+        string and negotiation headers. Requests already holding the
+        current ETag get a 304 before the controller runs. An ETag is
+        only sent with a served response, whereas a date or the "*"
+        ETag hold for any path, such as the path of an unknown client
+        or of unknown fields: the other requests get their 304 once
+        the controller served the resource, and its errors otherwise.
+    '''
+    def decorator(controller):
+        @wraps(controller)
+        def wrapper(**kwargs):
+            names = table_names(**kwargs) if callable(table_names) else table_names
+            tables = [TABLES[name] for name in client_tables(names)]
+
+            key = (
+                [(table.name, table.version) for table in tables],
+                extra_version() if extra_version else None,
+                request.full_path,
+                request.headers.get('Accept'),
+                request.headers.get('Accept-Encoding'),
+            )
+            etag = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:32]
+            # The date of the extra version is unknown, so that
+            # responses depending on one only get an ETag
+            dates = [table.last_modified for table in tables if table.last_modified is not None]
+            last_modified = max(dates) if dates and extra_version is None else None
+
+            if not request.if_none_match.star_tag and request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(controller(**kwargs))
+                if response.status_code != 200:
+                    return response
+                if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                    response.close()
+                    response = Response(status=304)
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.vary.update(('Accept', 'Accept-Encoding'))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,92 @@
+from flask import abort, request
+
+from server.controllers import TABLES, SCORING_MODEL, SCORING_BATCHER, use_scoring_batches
+from server.controllers.responses import conditional, document_response
+from server.controllers.scoring import compute_credit_score
+
+
+def score_response(client_id, app_record, previous_loan_counts):
+    '''
+        Score a single client with the model and build the response
+    '''
+    try:
+        features = SCORING_MODEL.features(app_record, previous_loan_counts)
+    except (FileNotFoundError, OSError):
+        abort(503, "Model not available")
+    except (TypeError, ValueError):
+        abort(400, "Supplied application record is invalid")
+
+    if use_scoring_batches:
+        probability = SCORING_BATCHER.submit(features)
+    else:
+        probability = float(SCORING_MODEL.predict(features.reshape(1, -1))[0])
+
+    return document_response({
+        "SK_ID_CURR": client_id,
+        "probability": probability,
+        "Credit Score": probability * 100,
+        "score": compute_credit_score(probability * 100),
+    })
+
+
+@conditional(["app", "bureau"], extra_version=lambda: SCORING_MODEL.version)
+def get_client_score(client_id):  # noqa: E501
+    """Score a client by ID with the model
+
+    Returns the default probability and credit score of a single client, computed from its current data # noqa: E501
+
+    :param client_id: ID of client
+    :type client_id: int
+
+    :rtype: ClientScore
+    """
+    if not isinstance(client_id, int):
+        abort(400, "Supplied ID is not an integer")
+
+    app_index = TABLES["app"].index
+
+    if client_id not in app_index:
+        abort(404, "Client not found")
+
+    app_record = app_index.rows(client_id).iloc[0].to_dict()
+    previous_loan_counts = len(TABLES["bureau"].index.positions(client_id))
+
+    return score_response(client_id, app_record, previous_loan_counts)
+
+
+def score_applicant():  # noqa: E501
+    """Score an applicant with the model
+
+    Returns the default probability and credit score of an applicant, given its application record in the body.
+    Its bureau loans are given by the optional "bureau" list, and read from the saved data otherwise # noqa: E501
+
+    :rtype: ClientScore
+    """
+    app_record = request.get_json(silent=True)
+
+    if not isinstance(app_record, dict):
+        abort(400, "Supplied body is not an application record")
+
+    bureau_records = app_record.pop("bureau", None)
+    client_id = app_record.get("SK_ID_CURR")
+
+    if bureau_records is not None:
+        if not isinstance(bureau_records, list):
+            abort(400, "Supplied bureau is not a list")
+        previous_loan_counts = len(bureau_records)
+    elif isinstance(client_id, int):
+        previous_loan_counts = len(TABLES["bureau"].index.positions(client_id))
+    else:
+        previous_loan_counts = 0
+
+    return score_response(client_id, app_record, previous_loan_counts)
+
+
+def get_scoring_stats():  # noqa: E501
+    """Get the statistics of the scoring batches
+
+    Returns the queue depth and batch size histogram of the scoring micro-batches # noqa: E501
+
+    :rtype: ScoringStatistics
+    """
+    return document_response(SCORING_BATCHER.stats())
@@ -0,0 +1,133 @@
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+from joblib import load
+
+
+def sanitize_feature_name(name):
+    '''
+        Strip the characters LightGBM does not accept in feature names,
+        the same way the training data columns were renamed
+    '''
+    return re.sub('[^A-Za-z0-9_]+', '', name)
+
+def compute_credit_score(p):
+    '''
+        Convert a default probability (in %) to a credit score,
+        the same way the dashboard does
+    '''
+    p = min(max(p / 100, 1e-6), 1 - 1e-6)
+    factor = 25 / np.log(2)
+    offset = 600 - factor * np.log(50)
+    val = (1 - p) / p
+    score = offset + factor * np.log(val)
+    return round(score)
+
+
+class ScoringModel:
+    '''
+        The trained LightGBM model, loaded the first time a client is scored,
+        along with a single-client version of the feature pipeline
+        (transform_data in the data modeling helper functions).
+    '''
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self._model = None
+        self._feature_names = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    @property
+    def version(self):
+        '''
+            Identify the model file by its size and modification time
+        '''
+        try:
+            stat = os.stat(self.model_path)
+        except OSError:
+            return None
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+    def load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    print("Loading model...")
+                    model = load(self.model_path)
+                    if hasattr(model, 'feature_name_'):
+                        feature_names = list(model.feature_name_)
+                    else:
+                        feature_names = list(model.feature_name())
+                    self._feature_names = feature_names
+                    self._model = model
+                    print("Model loaded.")
+        return self._model
+
+    @property
+    def feature_names(self):
+        self.load()
+        return self._feature_names
+
+    def features(self, app_record, previous_loan_counts):
+        '''
+            Build the feature vector of a single client, from its
+            application record and its number of bureau loans.
+
+            Mirrors transform_data: business features, the DAYS_EMPLOYED
+            anomaly, one-hot encoding of the categorical columns, and 0
+            for the model features missing from the data. Aggregates of
+            the other tables are not computed, as the model uses none.
+        '''
+        feature_names = self.feature_names
+        values = dict.fromkeys(feature_names, 0.0)
+
+        for column, value in app_record.items():
+            if column == 'SK_ID_CURR':
+                continue
+
+            if isinstance(value, str):
+                name = sanitize_feature_name(f"{column}_{value}")
+                if name in values:
+                    values[name] = 1.0
+            else:
+                name = sanitize_feature_name(column)
+                if name in values:
+                    values[name] = np.nan if value is None else float(value)
+
+        goods_price = np.float64(app_record.get('AMT_GOODS_PRICE', np.nan))
+        credit = np.float64(app_record.get('AMT_CREDIT', np.nan))
+        annuity = np.float64(app_record.get('AMT_ANNUITY', np.nan))
+        income = np.float64(app_record.get('AMT_INCOME_TOTAL', np.nan))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self_financed = (goods_price - credit) / goods_price * 100
+            annuity_on_income = annuity / income * 100
+
+        derived = {
+            'SELF_FINANCED_PERCENT': 0.0 if self_financed < 0 else self_financed,
+            'ANNUITY_ON_INCOME': annuity_on_income,
+            'previous_loan_counts': float(previous_loan_counts),
+        }
+        if app_record.get('DAYS_EMPLOYED') == 365243:
+            derived['DAYS_EMPLOYED'] = np.nan
+
+        for name, value in derived.items():
+            if name in values:
+                values[name] = value
+
+        return np.array([values[name] for name in feature_names], dtype=np.float64)
+
+    def predict(self, features):
+        '''
+            Return the default probability of each row of a 2D feature array
+        '''
+        model = self.load()
+        features = pd.DataFrame(features, columns=self._feature_names)
+        return model.predict_proba(features)[:, 1]
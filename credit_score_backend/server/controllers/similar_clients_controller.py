@@ -0,0 +1,130 @@
+import pandas as pd
+from flask import abort, request
+
+from server.controllers import (TABLES, DASHBOARD_APP_COLUMNS, SIMILARITY_CRITERIA,
+                                SIMILARITY_CATEGORICAL_CRITERIA, SIMILARITY_RANGE_CRITERIA)
+from server.controllers.responses import conditional, document_response
+from server.controllers.similarity_index import SimilarityIndex
+
+
+def build_similarity_index(table):
+    return SimilarityIndex(table.frame,
+                           categorical_columns=SIMILARITY_CATEGORICAL_CRITERIA,
+                           range_columns=SIMILARITY_RANGE_CRITERIA)
+
+def parse_similarity_args():
+    '''
+        Read the criteria, tolerance and result query parameters
+    '''
+    criteria = request.args.get("criteria")
+    if criteria is None:
+        criteria = SIMILARITY_CRITERIA
+    else:
+        criteria = [criterium.strip() for criterium in criteria.split(",") if criterium.strip()]
+        unknown = [criterium for criterium in criteria if criterium not in SIMILARITY_CRITERIA]
+        if unknown:
+            abort(400, f"Unknown criteria: {', '.join(unknown)}")
+
+    try:
+        tolerance = float(request.args.get("tolerance", 0.1))
+    except ValueError:
+        abort(400, "Supplied tolerance is not a number")
+    if not 0 <= tolerance <= 1:
+        abort(400, "Supplied tolerance must be between 0 and 1")
+
+    result = request.args.get("result", "ids")
+    if result not in ("ids", "stats"):
+        abort(400, "Supplied result must be ids or stats")
+
+    return criteria, tolerance, result
+
+def find_similar_clients(client_id, criteria, tolerance):
+    '''
+        Find the rows of the application table sharing the client's values
+        for the criteria, within tolerance for the range criteria.
+
+        Returns the criteria applied, as values to equal and bounds
+        to be between, along with the positions of the matching rows.
+    '''
+    app_table = TABLES["app"]
+
+    if client_id not in app_table.index:
+        abort(404, "Client not found")
+
+    client_info = app_table.index.rows(client_id, columns=criteria).iloc[0]
+
+    # Criteria the client has no value for are ignored, as in the dashboard
+    equal = {}
+    between = {}
+    for criterium in criteria:
+        value = client_info[criterium]
+        if pd.isnull(value) or value == '':
+            continue
+        if criterium in SIMILARITY_RANGE_CRITERIA:
+            value = float(value)
+            bounds = (value * (1 - tolerance), value * (1 + tolerance))
+            between[criterium] = (min(bounds), max(bounds))
+        else:
+            equal[criterium] = value
+
+    positions = app_table.derived("similarity", build_similarity_index).match(equal, between)
+    return equal, between, positions
+
+def mean_or_none(values):
+    mean = values.mean()
+    return None if pd.isnull(mean) else float(mean)
+
+def similar_clients_stats(client_ids, positions):
+    '''
+        Aggregate the credit scores and dashboard features of similar clients
+    '''
+    app_frame = TABLES["app"].frame
+    score_table = TABLES["credit_score"]
+
+    _, _, score_positions, _ = score_table.index.lookup(client_ids)
+    scores = score_table.frame["Credit Score"].iloc[score_positions]
+
+    numeric_columns = [column for column in DASHBOARD_APP_COLUMNS
+                       if column != "SK_ID_CURR" and column in app_frame.columns
+                       and pd.api.types.is_numeric_dtype(app_frame[column])]
+    features = app_frame.iloc[positions, app_frame.columns.get_indexer(numeric_columns)]
+
+    return {
+        "Credit Score": mean_or_none(scores),
+        "mean": {column: mean_or_none(features[column]) for column in numeric_columns},
+    }
+
+
+@conditional(["app", "credit_score"])
+def get_similar_clients(client_id):  # noqa: E501
+    """Get the clients similar to a client by ID
+
+    Returns the IDs of the clients sharing the client's values for the criteria query parameter
+    (every criterion by default), within tolerance for DAYS_BIRTH and AMT_INCOME_TOTAL,
+    or their aggregated statistics when result=stats # noqa: E501
+
+    :param client_id: ID of client
+    :type client_id: int
+
+    :rtype: SimilarClients
+    """
+    if not isinstance(client_id, int):
+        abort(400, "Supplied ID is not an integer")
+
+    criteria, tolerance, result = parse_similarity_args()
+
+    equal, between, positions = find_similar_clients(client_id, criteria, tolerance)
+    client_ids = TABLES["app"].frame["SK_ID_CURR"].to_numpy()[positions]
+
+    similar_clients = {
+        "SK_ID_CURR": client_id,
+        "criteria": {**equal, **{criterium: list(bounds) for criterium, bounds in between.items()}},
+        "count": int(len(client_ids)),
+    }
+
+    if result == "stats":
+        similar_clients.update(similar_clients_stats(client_ids, positions))
+    else:
+        similar_clients["clients"] = client_ids.tolist()
+
+    return document_response(similar_clients)
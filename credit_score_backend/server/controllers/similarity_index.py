@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+
+class SimilarityIndex:
+    '''
+        Secondary indexes over a table, to find the rows matching
+        several criteria without scanning it:
+            - for categorical columns, a bitset of the rows of each value
+            - for range columns, the values sorted along with their row positions
+    '''
+
+    def __init__(self, frame, categorical_columns, range_columns):
+        self.n_rows = len(frame)
+
+        # column -> {value: packed bitset of its rows}
+        self._bitsets = {}
+        for column in categorical_columns:
+            codes, uniques = pd.factorize(frame[column])
+            self._bitsets[column] = {value: np.packbits(codes == code)
+                                     for code, value in enumerate(uniques)}
+
+        # column -> (sorted values, row positions of the sorted values)
+        self._sorted = {}
+        for column in range_columns:
+            values = frame[column].to_numpy(dtype=np.float64)
+            order = np.argsort(values, kind='stable')
+            self._sorted[column] = (values[order], order)
+
+    def _empty(self):
+        return np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+
+    def equal(self, column, value):
+        '''
+            Bitset of the rows whose column equals value
+        '''
+        bitset = self._bitsets[column].get(value)
+        return self._empty() if bitset is None else bitset
+
+    def between(self, column, low, high):
+        '''
+            Bitset of the rows whose column is within [low, high]
+        '''
+        values, order = self._sorted[column]
+        start = np.searchsorted(values, low, side='left')
+        stop = np.searchsorted(values, high, side='right')
+
+        rows = np.zeros(self.n_rows, dtype=bool)
+        rows[order[start:stop]] = True
+        return np.packbits(rows)
+
+    def match(self, equal=None, between=None):
+        '''
+            Return the positions of the rows matching all the criteria:
+                - equal   : {column: value}
+                - between : {column: (low, high)}
+        '''
+        bitsets = [self.equal(column, value) for column, value in (equal or {}).items()]
+        bitsets += [self.between(column, low, high) for column, (low, high) in (between or {}).items()]
+
+        if not bitsets:
+            return np.arange(self.n_rows)
+
+        matching = bitsets[0].copy()
+        for bitset in bitsets[1:]:
+            np.bitwise_and(matching, bitset, out=matching)
+
+        return np.flatnonzero(np.unpackbits(matching, count=self.n_rows))
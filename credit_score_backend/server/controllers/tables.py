@@ -0,0 +1,349 @@
+import threading
+import time
+
+from flask import g, has_request_context
+
+from server.controllers.client_index import ClientIndex
+from server.controllers.memory import peak_rss, reset_peak_rss
+
+
+class Table:
+    '''
+        A loaded table, clustered by client, along with its per-client index.
+        Tables not keyed by client are clustered and indexed by their key.
+
+        The frame must already be clustered (see load_csv_file, which
+        stores it clustered in its parquet copy), the index checking it.
+
+        The version identifies the data the table was loaded from,
+        last modified when that data was.
+    '''
+
+    def __init__(self, name, frame, version=None, last_modified=None, key="SK_ID_CURR"):
+        self.name = name
+        self.frame = frame
+        self.version = version
+        self.last_modified = last_modified
+        self.index = ClientIndex(self.frame, key)
+        self._derived = {}
+        self._builders = {}
+        self._derived_lock = threading.Lock()
+
+    def derived(self, name, build):
+        '''
+            Return a structure derived from the table (secondary index,
+            aggregates...), built by build(table) the first time it is requested
+        '''
+        structure = self._derived.get(name)
+        if structure is None:
+            with self._derived_lock:
+                structure = self._derived.get(name)
+                if structure is None:
+                    structure = build(self)
+                    self._derived[name] = structure
+                    self._builders[name] = build
+        return structure
+
+    def discard_derived(self, predicate):
+        '''
+            Drop the derived structures whose name satisfies predicate
+        '''
+        with self._derived_lock:
+            for name in [name for name in self._derived if predicate(name)]:
+                del self._derived[name]
+                del self._builders[name]
+
+    def warm_from(self, other):
+        '''
+            Build the derived structures another version of the table has,
+            except for the ones named after the version of another table
+        '''
+        for name, build in list(other._builders.items()):
+            if isinstance(name, str):
+                self.derived(name, build)
+
+
+class TableNotReady(Exception):
+    '''
+        Raised when a table is requested before it is loaded,
+        while tables are loaded in the background
+    '''
+
+    def __init__(self, name):
+        super().__init__(f"Table {name} is not loaded yet")
+        self.name = name
+
+
+class LazyTable:
+    '''
+        A table loaded the first time it is requested, or in the background.
+
+        Concurrent first requests wait on a lock, so that
+        the table is loaded exactly once. The state of the table
+        goes from pending (or queued for background loading) to
+        loading, then loaded or failed.
+    '''
+
+    def __init__(self, name, loader, on_load=None, version=None):
+        self.name = name
+        self._loader = loader
+        self._on_load = on_load
+        self._version = version
+        self._table = None
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+
+        self.state = "pending"
+        self.started_at = None
+        self.load_seconds = None
+        self.peak_rss = None
+        self.error = None
+
+        self._reload_lock = threading.Lock()
+        self.reloading = False
+        self.reloads = 0
+        self.reload_error = None
+
+    @property
+    def loaded(self):
+        return self._table is not None
+
+    def get(self):
+        table = self._table
+        if table is None:
+            with self._lock:
+                if self._table is None:
+                    self._load()
+                table = self._table
+        return table
+
+    def _load(self):
+        print(f"Loading table {self.name}...")
+        self.state = "loading"
+        self.started_at = time.time()
+        start = time.perf_counter()
+        reset_peak_rss()
+        try:
+            self._table = self._loader()
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            raise
+        self.load_seconds = time.perf_counter() - start
+        self.peak_rss = peak_rss()
+        self.error = None
+        self.state = "loaded"
+        print(f"Table {self.name} loaded in {self.load_seconds:.1f}s, "
+              f"peak memory {self.peak_rss / 2**20:.0f} MB.")
+        if self._on_load is not None:
+            self._on_load(self.name, self._table)
+
+    def queue(self):
+        '''
+            Mark the table as queued for background loading,
+            unless it is already loaded or on its way
+        '''
+        with self._state_lock:
+            if self.state not in ("pending", "failed"):
+                return False
+            self.state = "queued"
+            return True
+
+    def load_quietly(self):
+        '''
+            Load the table, reporting failures instead of raising them
+        '''
+        try:
+            self.get()
+        except Exception as e:
+            print(f"Table {self.name} failed to load: {e}")
+
+    def reload(self):
+        '''
+            Load the table again and, if its data changed, swap the new
+            version in. Requests already holding the previous version keep
+            it, and the next ones get the new one. The version of the data
+            is checked first, when known (see version), so that unchanged
+            tables are never loaded again.
+
+            Returns the previous and new versions of the table when they
+            were swapped, None otherwise.
+        '''
+        with self._reload_lock:
+            current = self._table
+            if current is None:
+                return None
+
+            print(f"Reloading table {self.name}...")
+            self.reloading = True
+            start = time.perf_counter()
+            reset_peak_rss()
+            try:
+                if self._version is not None and self._version() == current.version:
+                    print(f"Table {self.name} is unchanged.")
+                    return None
+                table = self._loader()
+                if table.version == current.version:
+                    print(f"Table {self.name} is unchanged.")
+                    return None
+                table.warm_from(current)
+            except Exception as e:
+                self.reload_error = str(e)
+                print(f"Table {self.name} failed to reload: {e}")
+                return None
+            finally:
+                self.reloading = False
+
+            self._table = table
+            self.load_seconds = time.perf_counter() - start
+            self.peak_rss = peak_rss()
+            self.reloads += 1
+            self.reload_error = None
+            print(f"Table {self.name} reloaded in {self.load_seconds:.1f}s.")
+            return current, table
+
+    def status(self):
+        status = {"state": self.state}
+        if self.state == "loading":
+            status["elapsed_seconds"] = time.time() - self.started_at
+        elif self.state == "loaded":
+            status["rows"] = len(self._table.frame)
+            status["load_seconds"] = self.load_seconds
+            status["peak_rss_bytes"] = self.peak_rss
+            status["version"] = self._table.version
+            status["reloads"] = self.reloads
+            status["reloading"] = self.reloading
+            if self.reload_error is not None:
+                status["reload_error"] = self.reload_error
+        elif self.state == "failed":
+            status["error"] = self.error
+        return status
+
+
+class TableRegistry:
+    '''
+        Registry of the tables served by the API, by name.
+
+        When blocking, requesting a table loads it if needed. Otherwise
+        requesting a table that is not loaded yet queues it for background
+        loading and raises TableNotReady, so that requests never wait on
+        a table being loaded.
+
+        Tables can be reloaded while being served: within a request, a
+        table is always the version the request got first, and the
+        listeners registered with on_swap are told of every new version,
+        the ones registered with on_load of every table loaded.
+    '''
+
+    def __init__(self, blocking=True):
+        self.blocking = blocking
+        self._tables = {}
+        self._swap_listeners = []
+        self._load_listeners = []
+
+    def register(self, name, loader, version=None):
+        '''
+            Register a table loaded by loader(), along with a version()
+            function telling the version of its data without loading it, if any
+        '''
+        self._tables[name] = LazyTable(name, loader, on_load=self._loaded, version=version)
+
+    def _loaded(self, name, table):
+        for listener in self._load_listeners:
+            try:
+                listener(name, table)
+            except Exception as e:
+                print(f"Failed to process loaded table {name}: {e}")
+
+    def __getitem__(self, name):
+        if not has_request_context():
+            return self._get(name)
+
+        pinned = g.setdefault('tables', {})
+        table = pinned.get(name)
+        if table is None:
+            table = pinned[name] = self._get(name)
+        return table
+
+    def _get(self, name):
+        table = self._tables[name]
+        if not self.blocking and not table.loaded:
+            if table.queue():
+                threading.Thread(target=table.load_quietly, name=f"load-{name}", daemon=True).start()
+            raise TableNotReady(name)
+        return table.get()
+
+    def __contains__(self, name):
+        return name in self._tables
+
+    def __iter__(self):
+        return iter(self._tables)
+
+    def is_loaded(self, name):
+        return self._tables[name].loaded
+
+    def is_ready(self, names):
+        return all(self._tables[name].loaded for name in names)
+
+    def status(self):
+        '''
+            Return the loading state and timing of every table
+        '''
+        return {name: table.status() for name, table in self._tables.items()}
+
+    def preload(self, names):
+        '''
+            Load the given tables ahead of the first request
+        '''
+        for name in names:
+            self._tables[name].get()
+
+    def on_swap(self, listener):
+        '''
+            Call listener(name, previous, new) whenever
+            a new version of a table is swapped in
+        '''
+        self._swap_listeners.append(listener)
+
+    def on_load(self, listener):
+        '''
+            Call listener(name, table) whenever a table is first loaded
+        '''
+        self._load_listeners.append(listener)
+
+    def reload(self, name):
+        '''
+            Reload a loaded table, see LazyTable.reload
+        '''
+        swapped = self._tables[name].reload()
+        if swapped is not None:
+            for listener in self._swap_listeners:
+                listener(name, *swapped)
+        return swapped
+
+    def reload_in_background(self, names):
+        '''
+            Reload the given tables one after the other in a background thread
+        '''
+        def reload():
+            for name in names:
+                self.reload(name)
+
+        thread = threading.Thread(target=reload, name="table-reloader", daemon=True)
+        thread.start()
+        return thread
+
+    def load_in_background(self, names):
+        '''
+            Load the given tables one after the other in a background thread
+        '''
+        tables = [self._tables[name] for name in names if self._tables[name].queue()]
+
+        def load():
+            for table in tables:
+                table.load_quietly()
+            print("Training data loaded.")
+
+        thread = threading.Thread(target=load, name="table-loader", daemon=True)
+        thread.start()
+        return thread
@@ -14,38 +14,63 @@ st.set_page_config(layout="wide")
 
 st.title("CREDIT CLIENTS APP")
 
-# Get clients' main data
+# Get clients' IDs
 @st.cache(allow_output_mutation=True)
-def load_data():
+def load_client_ids():
     try:
         
-        req = requests.get(API_URL + "clients_app")
+        req = requests.get(API_URL + "clients_app", params={"fields": "SK_ID_CURR"})
         req.raise_for_status() 
-        app_data_json = req.json()  
-        app_data = pd.DataFrame(app_data_json)
+        app_ids = pd.DataFrame(req.json())
 
         
-        req_credit_scores = requests.get(API_URL + "clients_credit_score")
+        req_credit_scores = requests.get(API_URL + "clients_credit_score", params={"fields": "SK_ID_CURR"})
         req_credit_scores.raise_for_status()  
-        credit_score_data_json = req_credit_scores.json()  
-        credit_score_data = pd.DataFrame(credit_score_data_json)
+        credit_score_ids = pd.DataFrame(req_credit_scores.json())
 
-        main_data = pd.merge(left=app_data, right=credit_score_data, on='SK_ID_CURR', how='inner')
-
-        return main_data
+        # Clients with both an application and a credit score
+        return pd.merge(left=app_ids, right=credit_score_ids, on='SK_ID_CURR', how='inner')["SK_ID_CURR"]
 
     except requests.RequestException as e:
         st.error(f"Error fetching data: {e}")
-        return pd.DataFrame() 
+        return pd.Series(dtype=int) 
     except json.JSONDecodeError as e:
         st.error(f"Error decoding JSON: {e}")
-        return pd.DataFrame()  
+        return pd.Series(dtype=int)  
     except Exception as e:
         st.error(f"An unexpected error occurred: {e}")
-        return pd.DataFrame()  
+        return pd.Series(dtype=int)  
+
+# Get a client's main data
+@st.cache(allow_output_mutation=True)
+def load_client_info(client_id):
+    req = requests.get(API_URL + "client_app/{}".format(client_id), params={"fields": "dashboard"})
+    req.raise_for_status()
+    client_info = pd.DataFrame(req.json()).iloc[0]
+
+    req_credit_score = requests.get(API_URL + "client_credit_score/{}".format(client_id))
+    req_credit_score.raise_for_status()
+    client_info["Credit Score"] = req_credit_score.json()[0]["Credit Score"]
+
+    return client_info
+
+# Get the credit score and cohort aggregates of the clients similar to a client,
+# and of every client, computed by the API rather than from the whole tables
+@st.cache(allow_output_mutation=True)
+def load_comparison(client_id, criteria):
+    params = {"criteria": ",".join(criteria)}
+
+    req_similar = requests.get(API_URL + "similar_clients/{}".format(client_id),
+                               params=dict(params, result="stats"))
+    req_similar.raise_for_status()
+
+    req_comparison = requests.get(API_URL + "comparison/{}".format(client_id), params=params)
+    req_comparison.raise_for_status()
+
+    return req_similar.json(), req_comparison.json()
 
 # Load data
-main_data = load_data()
+client_ids = load_client_ids()
 
 def compute_credit_score(p):
     p=p/100
@@ -67,7 +92,7 @@ left_column_0, _ = st.columns((1, 3))
 # Populate filter
 left_column_0.header("Client ID")
 
-client_id = left_column_0.selectbox("", main_data["SK_ID_CURR"])
+client_id = left_column_0.selectbox("", client_ids)
 
 with st.expander("Compare data with clients with same :", expanded=True):
 
@@ -86,7 +111,7 @@ with st.expander("Compare data with clients with same :", expanded=True):
 #-------------------------------------------------------
 
 # Get selected client's main info
-client_info = main_data[main_data["SK_ID_CURR"]==client_id].iloc[0]
+client_info = load_client_info(client_id)
 
 # Set filter criteria
 client_age = client_info["DAYS_BIRTH"] if age_checkbox else "*"
@@ -138,8 +163,9 @@ filter_dict = {"DAYS_BIRTH": client_age \
                                           or pd.isnull(client_occupation_checkbox)) \
                                   else "*"}
 
-# Get filtered data
-similar_clients_data = get_filtered_client_data(main_data, filter_dict)
+# Get the similar clients' credit score and the cohort aggregates
+criteria = tuple(k for k,v in filter_dict.items() if str(v) != "*")
+similar_clients_stats, comparison = load_comparison(client_id, criteria)
 
 # Space out the maps so the first one is 2x the size of the other
 left_column, right_column = st.columns((2, 1))
@@ -149,11 +175,11 @@ left_column, right_column = st.columns((2, 1))
 #-------------------------------------------------------
 
 # Get client's credit score data
-client_prob_score = main_data[main_data["SK_ID_CURR"] == client_id].iloc[0]["Credit Score"]
+client_prob_score = client_info["Credit Score"]
 client_score = compute_credit_score(client_prob_score)
 
 # Get similar profiles credit score data
-similar_clients_credit_prob_score = similar_clients_data["Credit Score"].mean()
+similar_clients_credit_prob_score = similar_clients_stats["Credit Score"]
 similar_clients_credit_score = compute_credit_score(similar_clients_credit_prob_score)
 
 
@@ -234,35 +260,14 @@ left_column_2, right_column_2 = st.columns((1, 1))
 
 left_column_2.subheader("COMPARISON WITH SIMILAR CLIENTS")
 
-graph_similar_clients_data = pd.DataFrame()
-graph_client_info = pd.DataFrame()
-
-graph_similar_clients_data["AGE"] = similar_clients_data["DAYS_BIRTH"]/365*(-1)
-graph_similar_clients_data["YEARS AT CURRENT JOB"] = similar_clients_data["DAYS_EMPLOYED"]/365*(-1)
-graph_client_info["AGE"] = personal_info_client_df["AGE"]
-graph_client_info["YEARS AT CURRENT JOB"] = personal_info_client_df["YEARS AT CURRENT JOB"]
-
-
-best_cs_value = int(similar_clients_data["Credit Score"].min())
-worst_cs_value = int(similar_clients_data["Credit Score"].max())
-
-best_threshold = best_cs_value + 25
-
-best_data = similar_clients_data[similar_clients_data["Credit Score"]<=(best_threshold+1)].copy()
-best_data["AGE"] = best_data["DAYS_BIRTH"]/365*(-1)
-best_data["YEARS AT CURRENT JOB"] = best_data["DAYS_EMPLOYED"]/365*(-1)
-
-worst_threshold = worst_cs_value - 25
-worst_data = similar_clients_data[similar_clients_data["Credit Score"]>=(worst_threshold)].copy()
-worst_data["AGE"] = worst_data["DAYS_BIRTH"]/365*(-1)
-worst_data["YEARS AT CURRENT JOB"] = worst_data["DAYS_EMPLOYED"]/365*(-1)
+similar_aggregates = comparison["similar"]
 
 # DAYS
 
 fig = go.Figure()
 # Best similar clients
 fig.add_trace(go.Bar(
-    x=list(best_data[most_important_features_days].mean()),
+    x=cohort_means(similar_aggregates, "best", most_important_features_days),
     y=most_important_features_days,
     name='Best Client',
     marker_color='lightgreen',
@@ -280,7 +285,7 @@ fig.add_trace(go.Bar(
 
 # Average similar clients
 fig.add_trace(go.Bar(
-    x=list(graph_similar_clients_data[most_important_features_days].mean()),
+    x=cohort_means(similar_aggregates, "average", most_important_features_days),
     y=most_important_features_days,
     name='Average Clients',
     marker_color='lightblue',
@@ -289,7 +294,7 @@ fig.add_trace(go.Bar(
 
 # Worst similar clients
 fig.add_trace(go.Bar(
-    x=list(worst_data[most_important_features_days].mean()),
+    x=cohort_means(similar_aggregates, "worst", most_important_features_days),
     y=most_important_features_days,
     name='Worst Clients',
     marker_color='red',
@@ -307,7 +312,7 @@ left_column_2.plotly_chart(fig)
 fig = go.Figure()
 # Best similar clients
 fig.add_trace(go.Bar(
-    x=list(best_data[most_important_features_amt].mean()),
+    x=cohort_means(similar_aggregates, "best", most_important_features_amt),
     y=most_important_features_amt,
     name='Best Client',
     marker_color='lightgreen',
@@ -325,7 +330,7 @@ fig.add_trace(go.Bar(
 
 # Average similar clients
 fig.add_trace(go.Bar(
-    x=list(similar_clients_data[most_important_features_amt].mean()),
+    x=cohort_means(similar_aggregates, "average", most_important_features_amt),
     y=most_important_features_amt,
     name='Average Clients',
     marker_color='lightblue',
@@ -334,7 +339,7 @@ fig.add_trace(go.Bar(
 
 # Worst similar clients
 fig.add_trace(go.Bar(
-    x=list(worst_data[most_important_features_amt].mean()),
+    x=cohort_means(similar_aggregates, "worst", most_important_features_amt),
     y=most_important_features_amt,
     name='Worst Clients',
     marker_color='red',
@@ -352,7 +357,7 @@ left_column_2.plotly_chart(fig)
 fig = go.Figure()
 # Best similar clients
 fig.add_trace(go.Bar(
-    x=list(best_data[most_important_features_ext].mean()),
+    x=cohort_means(similar_aggregates, "best", most_important_features_ext),
     y=most_important_features_ext,
     name='Best Client',
     marker_color='lightgreen',
@@ -370,7 +375,7 @@ fig.add_trace(go.Bar(
 
 # Average similar clients
 fig.add_trace(go.Bar(
-    x=list(similar_clients_data[most_important_features_ext].mean()),
+    x=cohort_means(similar_aggregates, "average", most_important_features_ext),
     y=most_important_features_ext,
     name='Average Clients',
     marker_color='lightblue',
@@ -379,7 +384,7 @@ fig.add_trace(go.Bar(
 
 # Worst similar clients
 fig.add_trace(go.Bar(
-    x=list(worst_data[most_important_features_ext].mean()),
+    x=cohort_means(similar_aggregates, "worst", most_important_features_ext),
     y=most_important_features_ext,
     name='Worst Clients',
     marker_color='red',
@@ -397,30 +402,14 @@ left_column_2.plotly_chart(fig)
 
 right_column_2.subheader("COMPARISON WITH ALL CLIENTS")
 
-graph_main_data = pd.DataFrame()
-graph_main_data["AGE"] = main_data["DAYS_BIRTH"]/365*(-1)
-graph_main_data["YEARS AT CURRENT JOB"] = main_data["DAYS_EMPLOYED"]/365*(-1)
-
-best_cs_value = int(main_data["Credit Score"].min())
-worst_cs_value = int(main_data["Credit Score"].max())
-
-best_global_threshold = best_cs_value + 25
-worst_global_threshold = worst_cs_value - 25
-
-best_global_data = main_data[main_data["Credit Score"]<=best_global_threshold].copy()
-best_global_data["AGE"] = best_global_data["DAYS_BIRTH"]/365*(-1)
-best_global_data["YEARS AT CURRENT JOB"] = best_global_data["DAYS_EMPLOYED"]/365*(-1)
-
-worst_global_data = main_data[main_data["Credit Score"]>=worst_global_threshold].copy()
-worst_global_data["AGE"] = worst_global_data["DAYS_BIRTH"]/365*(-1)
-worst_global_data["YEARS AT CURRENT JOB"] = worst_global_data["DAYS_EMPLOYED"]/365*(-1)
+global_aggregates = comparison["global"]
 
 # DAYS
 
 fig = go.Figure()
 # Best global clients
 fig.add_trace(go.Bar(
-    x=list(best_global_data[most_important_features_days].mean()),
+    x=cohort_means(global_aggregates, "best", most_important_features_days),
     y=most_important_features_days,
     name='Best Client',
     marker_color='lightgreen',
@@ -438,7 +427,7 @@ fig.add_trace(go.Bar(
 
 # Average global clients
 fig.add_trace(go.Bar(
-    x=list(graph_main_data[most_important_features_days].mean()),
+    x=cohort_means(global_aggregates, "average", most_important_features_days),
     y=most_important_features_days,
     name='Average Clients',
     marker_color='lightblue',
@@ -447,7 +436,7 @@ fig.add_trace(go.Bar(
 
 # Worst global clients
 fig.add_trace(go.Bar(
-    x=list(worst_global_data[most_important_features_days].mean()),
+    x=cohort_means(global_aggregates, "worst", most_important_features_days),
     y=most_important_features_days,
     name='Worst Clients',
     marker_color='red',
@@ -465,7 +454,7 @@ right_column_2.plotly_chart(fig)
 fig = go.Figure()
 # Best global clients
 fig.add_trace(go.Bar(
-    x=list(best_global_data[most_important_features_amt].mean()),
+    x=cohort_means(global_aggregates, "best", most_important_features_amt),
     y=most_important_features_amt,
     name='Best Client',
     marker_color='lightgreen',
@@ -483,7 +472,7 @@ fig.add_trace(go.Bar(
 
 # Average global clients
 fig.add_trace(go.Bar(
-    x=list(main_data[most_important_features_amt].mean()),
+    x=cohort_means(global_aggregates, "average", most_important_features_amt),
     y=most_important_features_amt,
     name='Average Clients',
     marker_color='lightblue',
@@ -492,7 +481,7 @@ fig.add_trace(go.Bar(
 
 # Worst global clients
 fig.add_trace(go.Bar(
-    x=list(worst_global_data[most_important_features_amt].mean()),
+    x=cohort_means(global_aggregates, "worst", most_important_features_amt),
     y=most_important_features_amt,
     name='Worst Clients',
     marker_color='red',
@@ -510,7 +499,7 @@ right_column_2.plotly_chart(fig)
 fig = go.Figure()
 # Best global clients
 fig.add_trace(go.Bar(
-    x=list(best_global_data[most_important_features_ext].mean()),
+    x=cohort_means(global_aggregates, "best", most_important_features_ext),
     y=most_important_features_ext,
     name='Best Client',
     marker_color='lightgreen',
@@ -528,7 +517,7 @@ fig.add_trace(go.Bar(
 
 # Average global clients
 fig.add_trace(go.Bar(
-    x=list(main_data[most_important_features_ext].mean()),
+    x=cohort_means(global_aggregates, "average", most_important_features_ext),
     y=most_important_features_ext,
     name='Average Clients',
     marker_color='lightblue',
@@ -537,7 +526,7 @@ fig.add_trace(go.Bar(
 
 # Worst global clients
 fig.add_trace(go.Bar(
-    x=list(worst_global_data[most_important_features_ext].mean()),
+    x=cohort_means(global_aggregates, "worst", most_important_features_ext),
     y=most_important_features_ext,
     name='Worst Clients',
     marker_color='red',